@@ -0,0 +1,126 @@
+# benchmarks/corpus.py
+"""Generate synthetic PDF corpora for the benchmarks.
+
+Documents mix text pages and scanned-image pages across common page sizes,
+each with a citation number in the top-right area the viewer crops:
+
+    python -m benchmarks.corpus /tmp/corpus --count 10000
+"""
+import argparse
+import io
+import os
+import random
+
+import fitz
+from PIL import Image, ImageDraw, ImageFilter
+
+# (name, width, height) in points
+PAGE_SIZES = [
+    ("letter", 612, 792),
+    ("legal", 612, 1008),
+    ("a4", 595, 842),
+    ("tabloid", 792, 1224),
+]
+SCAN_DPI = 300
+MARKER_NAME = ".corpus"
+
+
+def citation_number(rng):
+    return f"{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.randrange(10**7):07d}"
+
+
+def scanned_page_image(width_pt, height_pt, citation, rng):
+    """Return JPEG bytes of a grayscale 'scan' with noise, rules and a citation number"""
+    width = int(width_pt / 72 * SCAN_DPI)
+    height = int(height_pt / 72 * SCAN_DPI)
+    img = Image.new("L", (width, height), 245)
+    draw = ImageDraw.Draw(img)
+
+    # Header block with the citation number in the top-right quadrant
+    x = int(width * (0.55 + rng.random() * 0.1))
+    y = int(height * (0.05 + rng.random() * 0.1))
+    draw.text((x, y), f"CITATION NO. {citation}", fill=20, font_size=SCAN_DPI // 6)
+    for line in range(25):
+        ly = int(height * 0.35) + line * SCAN_DPI // 4
+        draw.line((SCAN_DPI // 2, ly, width - SCAN_DPI // 2, ly), fill=90, width=2)
+
+    # Scanner noise and slight blur
+    for _ in range(width * height // 2000):
+        draw.point((rng.randrange(width), rng.randrange(height)), fill=rng.randrange(120, 255))
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+
+    # Scanners typically emit JPEG pages of a few hundred KB
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=60)
+    return buf.getvalue()
+
+
+def add_text_page(doc, width, height, citation, rng):
+    page = doc.new_page(width=width, height=height)
+    page.insert_text(
+        (width * (0.55 + rng.random() * 0.1), height * (0.06 + rng.random() * 0.1)),
+        f"CITATION NO. {citation}",
+        fontsize=14,
+    )
+    for line in range(30):
+        page.insert_text(
+            (54, height * 0.35 + line * 14),
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2,
+            fontsize=9,
+        )
+
+
+def add_scanned_page(doc, width, height, image):
+    page = doc.new_page(width=width, height=height)
+    page.insert_image(page.rect, stream=image)
+
+
+def generate_corpus(directory, count, seed=0, scanned_ratio=0.5, templates=8):
+    """Write `count` PDFs into directory, reusing an existing corpus of the same size"""
+    os.makedirs(directory, exist_ok=True)
+    marker = os.path.join(directory, MARKER_NAME)
+    signature = f"{count} {seed} {scanned_ratio}"
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            if f.read() == signature:
+                return directory
+
+    rng = random.Random(seed)
+    # Encoding a full-page scan is the slow part, so a few templates per page
+    # size are generated up front and shared between documents
+    scans = {
+        name: [scanned_page_image(w, h, citation_number(rng), rng) for _ in range(templates)]
+        for name, w, h in PAGE_SIZES
+    }
+
+    for i in range(count):
+        name, width, height = rng.choice(PAGE_SIZES)
+        doc = fitz.open()
+        if rng.random() < scanned_ratio:
+            add_scanned_page(doc, width, height, rng.choice(scans[name]))
+        else:
+            add_text_page(doc, width, height, citation_number(rng), rng)
+        doc.save(os.path.join(directory, f"scan_{i:06d}_{name}.pdf"), garbage=1)
+        doc.close()
+
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(signature)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scanned-ratio", type=float, default=0.5,
+        help="fraction of documents that are scanned images rather than text",
+    )
+    args = parser.parse_args()
+    generate_corpus(args.directory, args.count, args.seed, args.scanned_ratio)
+    print(f"Wrote {args.count} PDFs to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
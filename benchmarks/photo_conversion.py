@@ -0,0 +1,116 @@
+# benchmarks/photo_conversion.py
+"""Compare the pixmap-to-Tk conversion paths of PDFRenderer.
+
+For each document the pixmap is rendered once in "exact" mode (no resize
+needed) and then converted repeatedly through:
+
+- pil:    Image.frombytes + ImageTk.PhotoImage (the fallback path)
+- direct: pix.tobytes("ppm") + tk.PhotoImage (PPMCrop, the fast path)
+
+Time per frame and Python-side peak allocations (tracemalloc; Tk's own
+copy of the pixels is not visible to it) are printed as JSON:
+
+    python -m benchmarks.photo_conversion [--count 20] [--repeat 20]
+
+Without a display (or Xvfb) only the steps up to the Tk image are timed.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import fitz
+from PIL import Image, ImageTk
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import ensure_display
+from utils.pdf_renderer import PDFRenderer
+
+
+def render_pixmaps(directory, count):
+    renderer = PDFRenderer()
+    renderer.render_mode = "exact"
+    pixmaps = []
+    pdf_files = sorted(f for f in os.listdir(directory) if f.endswith(".pdf"))
+    for pdf_file in pdf_files[:count]:
+        with fitz.open(os.path.join(directory, pdf_file)) as doc:
+            page = doc[0]
+            clip = renderer.clip_rect(page.rect)
+            zoom = renderer.zoom_for(clip)
+            pixmaps.append(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip))
+    return pixmaps
+
+
+def convert_pil(pix, with_tk):
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    return ImageTk.PhotoImage(img) if with_tk else img
+
+
+def convert_direct(pix, with_tk):
+    import tkinter as tk
+
+    data = pix.tobytes("ppm")
+    return tk.PhotoImage(data=data, format="PPM") if with_tk else data
+
+
+def measure(convert, pixmaps, repeat, with_tk):
+    times = []
+    peaks = []
+    for pix in pixmaps:
+        for _ in range(repeat):
+            tracemalloc.start()
+            start = time.perf_counter()
+            photo = convert(pix, with_tk)
+            times.append((time.perf_counter() - start) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del photo
+    return {
+        "frames": len(times),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "peak_alloc_kb": round(statistics.median(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pixmap-to-Tk conversion")
+    parser.add_argument("--count", type=int, default=20, help="documents to convert")
+    parser.add_argument("--repeat", type=int, default=20, help="conversions per document")
+    parser.add_argument(
+        "--corpus",
+        default=os.path.join(tempfile.gettempdir(), "pdf_viewer_bench", "photo"),
+    )
+    args = parser.parse_args()
+
+    generate_corpus(args.corpus, args.count)
+    pixmaps = render_pixmaps(args.corpus, args.count)
+
+    display = ensure_display()
+    root = None
+    if display:
+        import tkinter as tk
+
+        root = tk.Tk()
+        root.withdraw()
+    try:
+        with_tk = root is not None
+        report = {
+            "tk": with_tk,
+            "pixmap": f"{pixmaps[0].width}x{pixmaps[0].height}" if pixmaps else None,
+            "pil": measure(convert_pil, pixmaps, args.repeat, with_tk),
+            "direct": measure(convert_direct, pixmaps, args.repeat, with_tk),
+        }
+    finally:
+        if root is not None:
+            root.destroy()
+        if display not in (True, False):
+            display.terminate()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
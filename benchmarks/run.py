@@ -0,0 +1,247 @@
+# benchmarks/run.py
+"""Benchmark suite for the viewer's hot paths.
+
+Generates (or reuses) a synthetic corpus per size and times directory
+scanning, CSV save/load, journal appends, single-document rendering
+(cold, from the disk cache and from memory) and sidebar build/update.
+Results are printed as JSON with p50/p95/p99 per stage and the peak RSS
+after each size:
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output bench.json
+
+The sidebar stage needs a display; on a headless machine an Xvfb server
+is started when one is installed, otherwise the stage is skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from utils.crop_cache import DiskCropCache
+from utils.directory_scanner import scan_pdf_names
+from utils.file_handler import FileHandler
+from utils.pdf_renderer import PDFRenderer
+from utils.render_ahead import RenderAhead
+from utils.render_cache import RenderCache
+
+
+def percentiles(samples_ms):
+    """Summarize a list of millisecond samples"""
+    if not samples_ms:
+        return None
+    ordered = sorted(samples_ms)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(rank(0.50), 3),
+        "p95_ms": round(rank(0.95), 3),
+        "p99_ms": round(rank(0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 2**20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(peak * scale / 2**20, 1)
+
+
+def time_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def bench_scan(directory, repeat):
+    file_handler = FileHandler()
+    samples = []
+    for _ in range(repeat):
+        elapsed, names = time_ms(
+            lambda: sorted(scan_pdf_names(directory, file_handler.is_valid_pdf))
+        )
+        samples.append(elapsed)
+    return samples, names
+
+
+def bench_csv(pdf_files, repeat, appends=200):
+    """Time CSV save/load and journal appends with notes on 60% of the files"""
+    notes_dir = tempfile.mkdtemp(prefix="pdf_viewer_bench_notes_")
+    rng = random.Random(1)
+    file_handler = FileHandler()
+    file_handler.current_directory = notes_dir
+    file_handler.pdf_files = list(pdf_files)
+    file_handler.load_existing_notes()
+    for pdf_file in pdf_files:
+        if rng.random() < 0.6:
+            file_handler.notes_dict[pdf_file] = f"C{rng.randrange(10**7):07d}"
+        if rng.random() < 0.05:
+            file_handler.flags_dict[pdf_file] = True
+
+    save = [time_ms(file_handler.save_to_csv)[0] for _ in range(repeat)]
+    load = []
+    for _ in range(repeat):
+        file_handler.journal.close()
+        load.append(time_ms(file_handler.load_existing_notes)[0])
+
+    append = []
+    for i in range(min(appends, len(pdf_files))):
+        append.append(time_ms(file_handler.set_note, pdf_files[i], f"J{i:07d}")[0])
+    file_handler.close()
+    shutil.rmtree(notes_dir, ignore_errors=True)
+    return {"csv_save": save, "csv_load": load, "journal_append": append}
+
+
+def bench_render(directory, pdf_files, samples):
+    rng = random.Random(2)
+    chosen = rng.sample(pdf_files, min(samples, len(pdf_files)))
+    paths = [os.path.join(directory, pdf_file) for pdf_file in chosen]
+
+    renderer = PDFRenderer()
+    disk_cache = DiskCropCache(directory, renderer)
+    disk_cache.invalidate()
+    cold = []
+    for path in paths:
+        elapsed, img = time_ms(renderer.render_image, path)
+        cold.append(elapsed)
+        disk_cache.put(path, img)
+
+    render_ahead = RenderAhead(renderer, RenderCache(max_entries=len(paths)))
+    render_ahead.disk_cache = disk_cache
+    from_disk = [time_ms(render_ahead.get, path)[0] for path in paths]
+    from_memory = [time_ms(render_ahead.get, path)[0] for path in paths]
+    render_ahead.shutdown()
+    disk_cache.invalidate()
+    return {
+        "render_cold": cold,
+        "render_disk_cache": from_disk,
+        "render_memory_cache": from_memory,
+    }
+
+
+def ensure_display():
+    """Make sure Tk can open a window; returns an Xvfb process to stop, True, or False"""
+    if sys.platform in ("win32", "darwin") or os.environ.get("DISPLAY"):
+        return True
+    if not shutil.which("Xvfb"):
+        return False
+    display = ":97"
+    xvfb = subprocess.Popen(
+        ["Xvfb", display, "-screen", "0", "1600x1000x24"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    time.sleep(1)
+    os.environ["DISPLAY"] = display
+    return xvfb
+
+
+def bench_sidebar(size, steps):
+    import tkinter as tk
+
+    from benchmarks.sidebar_latency import bench_size
+
+    root = tk.Tk()
+    root.geometry("400x800")
+    try:
+        result = bench_size(root, size, steps)
+    finally:
+        root.destroy()
+    return {
+        "sidebar_build_ms": round(result["build_ms"], 3),
+        "sidebar_navigate": result["navigate_ms"],
+        "sidebar_save": result["save_ms"],
+    }
+
+
+def run(args):
+    display = None if args.no_sidebar else ensure_display()
+    results = []
+    try:
+        for size in args.sizes:
+            directory = os.path.join(args.corpus_root, str(size))
+            print(f"Preparing corpus of {size} PDFs in {directory}", file=sys.stderr)
+            generate_corpus(directory, size)
+
+            result = {"size": size}
+            scan, pdf_files = bench_scan(directory, args.repeat)
+            stages = {"scan": scan}
+            stages.update(bench_csv(pdf_files, args.repeat))
+            stages.update(bench_render(directory, pdf_files, args.render_samples))
+            if display:
+                sidebar = bench_sidebar(size, args.steps)
+                result["sidebar_build_ms"] = sidebar.pop("sidebar_build_ms")
+                stages.update(sidebar)
+            elif not args.no_sidebar:
+                result["sidebar"] = "skipped: no display available"
+
+            for name, samples in stages.items():
+                result[name] = percentiles(samples)
+            result["peak_rss_mb"] = peak_rss_mb()
+            results.append(result)
+    finally:
+        if display not in (None, True, False):
+            display.terminate()
+
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the viewer's hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument(
+        "--corpus-root",
+        default=os.path.join(tempfile.gettempdir(), "pdf_viewer_bench"),
+        help="where generated corpora are kept and reused between runs",
+    )
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="repetitions of the scan and CSV stages")
+    parser.add_argument("--render-samples", type=int, default=30,
+                        help="documents rendered per size")
+    parser.add_argument("--steps", type=int, default=50,
+                        help="sidebar navigate/save steps per size")
+    parser.add_argument("--no-sidebar", action="store_true",
+                        help="skip the sidebar stage (no display needed)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
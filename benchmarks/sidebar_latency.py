@@ -0,0 +1,87 @@
+# benchmarks/sidebar_latency.py
+"""Measure sidebar save/navigate latency as the directory grows.
+
+Run from the project root with a display available:
+
+    python -m benchmarks.sidebar_latency [--sizes 100 1000 10000 50000]
+
+No PDFs are rendered; the sidebar is driven directly with a synthetic
+listing so only the list update paths are timed. Saves go through the
+viewer's real save_note, as pressing Enter in the note field does.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from ui.pdf_viewer import PDFViewer
+from ui.sidebar import Sidebar
+from utils.file_handler import FileHandler
+
+
+def time_ms(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_size(root, size, steps):
+    directory = tempfile.mkdtemp(prefix="sidebar_bench_")
+    file_handler = FileHandler()
+    file_handler.current_directory = directory
+    file_handler.pdf_files = [f"scan_{i:06d}.pdf" for i in range(size)]
+    file_handler.load_existing_notes()
+
+    frame = ttk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+    sidebar = Sidebar(frame, file_handler)
+    pdf_viewer = PDFViewer(frame, file_handler)
+    # Only the viewer knows the sidebar: navigating must not render the
+    # (nonexistent) PDFs, but saving restyles rows like the app does
+    pdf_viewer.set_sidebar(sidebar)
+
+    build_ms = time_ms(sidebar.update_pdf_list)
+    root.update()
+
+    navigate = []
+    save = []
+    for i in range(steps):
+        navigate.append(time_ms(sidebar.on_item_click, i))
+        pdf_viewer.note_var.set(f"CIT{i:07d}")
+        save.append(time_ms(pdf_viewer.save_note))
+        root.update()
+
+    file_handler.close()
+    pdf_viewer.render_ahead.shutdown()
+    pdf_viewer.document_pool.shutdown()
+    pdf_viewer.inspect_view.shutdown()
+    pdf_viewer.text_index.stop()
+    frame.destroy()
+    return {"size": size, "build_ms": build_ms, "navigate_ms": navigate, "save_ms": save}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000]
+    )
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.geometry("400x800")
+    print(f"{'files':>8} {'build ms':>10} {'navigate ms':>12} {'save ms':>10}")
+    for size in args.sizes:
+        result = bench_size(root, size, args.steps)
+        print(
+            f"{size:>8} {result['build_ms']:>10.2f} "
+            f"{statistics.median(result['navigate_ms']):>12.3f} "
+            f"{statistics.median(result['save_ms']):>10.3f}"
+        )
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
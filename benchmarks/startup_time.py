@@ -0,0 +1,85 @@
+# benchmarks/startup_time.py
+"""Measure time from process start to the first interactive window.
+
+Launches the viewer repeatedly with the hidden --startup-probe flag, which
+makes it write a timestamp once the main window is mapped and then exit:
+
+    python -m benchmarks.startup_time [--runs 10]
+    python -m benchmarks.startup_time --exe "dist/PDF Directory Viewer/PDF Directory Viewer"
+
+--compare-eager also times a run that imports fitz and PIL before the UI,
+as the viewer did before imports were deferred. Needs a display (or Xvfb).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run import ensure_display, percentiles
+
+EAGER_LAUNCHER = (
+    "import sys, runpy; import fitz; from PIL import Image, ImageTk; "
+    "sys.argv[0] = 'main.py'; runpy.run_path('main.py', run_name='__main__')"
+)
+
+
+def time_launch(command, timeout=60):
+    """Return seconds from launching command to its window becoming interactive"""
+    fd, probe = tempfile.mkstemp(prefix="pdf_viewer_startup_", suffix=".txt")
+    os.close(fd)
+    os.remove(probe)
+    # Keep the runs away from the user's session and settings
+    config_dir = tempfile.mkdtemp(prefix="pdf_viewer_config_")
+    env = dict(os.environ, XDG_CONFIG_HOME=config_dir, APPDATA=config_dir)
+    try:
+        start = time.time()
+        subprocess.run(
+            command + ["--no-restore", "--startup-probe", probe],
+            timeout=timeout, check=True, env=env,
+        )
+        with open(probe, encoding="utf-8") as f:
+            return float(f.read()) - start
+    finally:
+        if os.path.exists(probe):
+            os.remove(probe)
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+def measure(command, runs):
+    # The first launch warms the OS file cache and is reported separately
+    cold = time_launch(command)
+    warm = [time_launch(command) * 1000 for _ in range(runs)]
+    return {"first_launch_ms": round(cold * 1000, 1), "warm": percentiles(warm)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure viewer startup time")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--exe", help="time a built executable instead of main.py")
+    parser.add_argument("--compare-eager", action="store_true",
+                        help="also time startup with fitz/PIL imported up front")
+    args = parser.parse_args()
+
+    display = ensure_display()
+    if not display:
+        sys.exit("No display available (install Xvfb on headless machines)")
+    try:
+        report = {}
+        if args.exe:
+            report["exe"] = measure([args.exe], args.runs)
+        else:
+            report["lazy"] = measure([sys.executable, "main.py"], args.runs)
+            if args.compare_eager:
+                report["eager"] = measure([sys.executable, "-c", EAGER_LAUNCHER], args.runs)
+    finally:
+        if display is not True:
+            display.terminate()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,124 @@
+import argparse
+import re
+import time
 import tkinter as tk
 from ui.app import PDFViewerApp
+from utils.memory_budget import DEFAULT_MAX_BYTES
+from utils.pdf_renderer import RENDER_MODES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PDF Directory Viewer")
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="store notes in a shared SQLite database (pdf_notes.db) so "
+             "several operators can work one directory",
+    )
+    parser.add_argument(
+        "--operator",
+        help="name recorded with notes and claims in shared mode "
+             "(default: user@host)",
+    )
+    parser.add_argument(
+        "--citation-pattern",
+        help="regular expression for citation numbers, used to pre-fill the "
+             "note from the PDFs' text layer and to flag saved notes that "
+             "don't match it; pass an empty string to turn both off "
+             "(default: pre-fill with letters followed by 6-10 digits, and "
+             "check notes only if the directory has a pattern configured)",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="memory for rendered images (crop cache, prefetched crops, "
+             "inspection tiles) in MB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default="auto",
+        help="how the crop is rasterized; \"exact\" renders straight at the "
+             "display width and skips the resize (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        metavar="N",
+        help="read the next N PDFs into memory ahead of the selection "
+             "(default: 20 on network shares, 0 on local folders)",
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="list the PDFs of every subfolder too, grouped by folder, with "
+             "each folder's notes kept in its own pdf_notes.csv",
+    )
+    parser.add_argument(
+        "--worklist",
+        metavar="FILE",
+        help="only list the PDFs named in FILE, one per line "
+             "(e.g. written by reconcile.py --worklist)",
+    )
+    parser.add_argument(
+        "--no-restore",
+        action="store_true",
+        help="start without reopening the last directory and document",
+    )
+    parser.add_argument(
+        "--startup-probe",
+        metavar="FILE",
+        help=argparse.SUPPRESS,  # used by benchmarks/startup_time.py
+    )
+    args = parser.parse_args()
+    if args.recursive and args.shared:
+        parser.error("--recursive can't be combined with --shared")
+    if args.citation_pattern:
+        try:
+            re.compile(args.citation_pattern)
+        except re.error as e:
+            parser.error(f"invalid --citation-pattern: {e}")
+    if args.worklist:
+        try:
+            args.worklist = load_worklist(args.worklist)
+        except OSError as e:
+            parser.error(f"cannot read --worklist: {e}")
+    return args
+
+
+def load_worklist(path):
+    """Return the set of file names listed in path, one per line"""
+    with open(path, encoding="utf-8-sig") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def report_startup(app, path):
+    """Write the wall-clock time the window became interactive to path, then exit"""
+    app.root.wait_visibility()
+    app.root.update_idletasks()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{time.time():.6f}\n")
+    app.on_close()
 
 
 def main():
+    args = parse_args()
     root = tk.Tk()
-    app = PDFViewerApp(root)
+    app = PDFViewerApp(
+        root,
+        shared=args.shared,
+        operator=args.operator,
+        citation_pattern=args.citation_pattern,
+        memory_mb=args.memory_mb,
+        read_ahead=args.read_ahead,
+        render_mode=args.render_mode,
+        restore_session=not args.no_restore and not args.startup_probe,
+        worklist=args.worklist,
+        recursive=args.recursive,
+    )
+    if args.startup_probe:
+        root.after(0, report_startup, app, args.startup_probe)
     root.mainloop()
 
 
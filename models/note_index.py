@@ -0,0 +1,112 @@
+# models/note_index.py
+import re
+
+
+class NoteIndex:
+    """Reverse index from note value to the files carrying it.
+
+    Citation numbers must be unique across a batch. Keeping the files of
+    every note value lets each save find its collisions with a dict lookup
+    instead of a pass over notes_dict, and keeps the set of duplicated and
+    malformed files current for the sidebar. Notes are compared stripped
+    and upper-cased, as they are entered. Unlisted files (whose notes are
+    kept in the CSV) still count, since their citations were issued too.
+    """
+
+    def __init__(self, file_handler, pattern=None):
+        self.file_handler = file_handler
+        self.pattern = re.compile(pattern) if pattern else None
+        self._files = {}  # note value -> set of files with that note
+        self.duplicates = set()  # files whose note is also on another file
+        self.malformed = set()  # files whose note doesn't match the pattern
+
+    @staticmethod
+    def normalize(note):
+        return (note or "").strip().upper()
+
+    def set_pattern(self, pattern):
+        """Check notes against pattern (a regex string; empty turns checking off)"""
+        self.pattern = re.compile(pattern) if pattern else None
+        self.malformed = {
+            pdf_file
+            for note, files in self._files.items()
+            if not self.matches(note)
+            for pdf_file in files
+        }
+
+    def matches(self, note):
+        return self.pattern is None or self.pattern.fullmatch(note) is not None
+
+    def rebuild(self):
+        """Index every note (on directory load)"""
+        self._files = {}
+        self.duplicates = set()
+        self.malformed = set()
+        for pdf_file, note in self.file_handler.notes_dict.items():
+            self._add(pdf_file, self.normalize(note))
+
+    def _add(self, pdf_file, note):
+        if not note:
+            return
+        files = self._files.setdefault(note, set())
+        files.add(pdf_file)
+        if len(files) == 2:
+            self.duplicates.update(files)
+        elif len(files) > 2:
+            self.duplicates.add(pdf_file)
+        if not self.matches(note):
+            self.malformed.add(pdf_file)
+
+    def _remove(self, pdf_file, note):
+        files = self._files.get(note)
+        if not files or pdf_file not in files:
+            return set()
+        files.discard(pdf_file)
+        self.duplicates.discard(pdf_file)
+        self.malformed.discard(pdf_file)
+        if not files:
+            del self._files[note]
+        elif len(files) == 1:
+            # The remaining file is no longer a duplicate
+            self.duplicates.difference_update(files)
+            return set(files)
+        return set()
+
+    def update(self, pdf_file, old_note):
+        """Re-file pdf_file after its note changed from old_note.
+
+        Returns the other files whose duplicate state changed with it, so
+        their rows can be restyled.
+        """
+        old_note = self.normalize(old_note)
+        note = self.normalize(self.file_handler.notes_dict.get(pdf_file))
+        if note == old_note:
+            return set()
+        changed = self._remove(pdf_file, old_note)
+        self._add(pdf_file, note)
+        files = self._files.get(note, ())
+        if len(files) == 2:
+            changed.update(files)
+        changed.discard(pdf_file)
+        return changed
+
+    def others(self, pdf_file):
+        """Return the other files carrying pdf_file's note, sorted"""
+        note = self.normalize(self.file_handler.notes_dict.get(pdf_file))
+        return sorted(self._files.get(note, set()) - {pdf_file})
+
+    def problem(self, pdf_file):
+        """Describe what is wrong with pdf_file's note, or return None"""
+        note = self.normalize(self.file_handler.notes_dict.get(pdf_file))
+        if not note:
+            return None
+        problems = []
+        if pdf_file in self.duplicates:
+            others = self.others(pdf_file)
+            shown = ", ".join(others[:5])
+            if len(others) > 5:
+                shown += f" and {len(others) - 5} more"
+            problems.append(f"{note} is also the note of {shown}")
+        if pdf_file in self.malformed:
+            problems.append(f"{note} doesn't look like a citation number")
+        return "; ".join(problems) or None
@@ -14,6 +14,7 @@ class PDFListItem:
         # Colors
         self.completed_color = "#00FF00"    # Bright green
         self.flagged_color = "#FF0000"      # Bright red
+        self.problem_color = "#FFA500"      # Orange: duplicate or malformed note
         self.default_color = "white"
         self.separator_color = "#404040"     # Dark gray for separator
         self.selected_bg = "#0066cc"        # Bright blue for selection
@@ -23,9 +24,8 @@ class PDFListItem:
         self.setup_ui()
 
     def setup_ui(self):
-        # Create main frame
+        # Create main frame; the sidebar positions it as a row of its list
         self.frame = ttk.Frame(self.parent, style="Sidebar.TFrame")
-        self.frame.pack(fill=tk.X)
 
         # Create content frame with background control
         self.content_frame = tk.Frame(
@@ -66,7 +66,7 @@ class PDFListItem:
         
         self.label = tk.Label(
             self.label_frame,
-            text=f"{prefix}{self.pdf_file}",
+            text=f"{prefix}{self.display_name}",
             background=self.default_bg,
             foreground=self.default_color,
             font=("Arial", 10),
@@ -92,6 +92,18 @@ class PDFListItem:
         # Initial appearance update
         self.update_appearance()
 
+    @property
+    def display_name(self):
+        """The file name, without the folder it sits in within a workspace"""
+        return self.pdf_file.rpartition("/")[2]
+
+    def bind_to(self, pdf_file, index):
+        """Reuse this row widget for another PDF as the list scrolls"""
+        self.pdf_file = pdf_file
+        self.index = index
+        self.var.set(self.file_handler.flags_dict.get(pdf_file, False))
+        self.update_appearance()
+
     def is_selected(self):
         """Check if this item is currently selected"""
         if hasattr(self.file_handler, 'sidebar'):
@@ -116,7 +128,7 @@ class PDFListItem:
 
     def on_flag_toggle(self):
         try:
-            self.file_handler.flags_dict[self.pdf_file] = self.var.get()
+            self.file_handler.set_flag(self.pdf_file, self.var.get())
             if self.flag_callback:
                 self.flag_callback(self.pdf_file)
         except Exception as e:
@@ -139,13 +151,21 @@ class PDFListItem:
             )
             is_flagged = self.file_handler.flags_dict.get(self.pdf_file, False)
             is_selected = self.is_selected()
+            note_index = self.file_handler.note_index
+            has_problem = (
+                self.pdf_file in note_index.duplicates
+                or self.pdf_file in note_index.malformed
+            )
             
             # Update checkmark prefix
-            prefix = "✓ " if is_completed else "  "
+            if has_problem:
+                prefix = "⚠ "
+            else:
+                prefix = "✓ " if is_completed else "  "
             
             # Update all components only if they still exist
             if self.label.winfo_exists():
-                self.label.configure(text=f"{prefix}{self.pdf_file}")
+                self.label.configure(text=f"{prefix}{self.display_name}")
                 
                 # Set background color based on selection
                 bg_color = self.selected_bg if is_selected else self.default_bg
@@ -159,6 +179,9 @@ class PDFListItem:
                 if is_flagged:
                     self.label.configure(foreground=self.flagged_color)
                     self.checkbox.configure(fg=self.flagged_color)
+                elif has_problem:
+                    self.label.configure(foreground=self.problem_color)
+                    self.checkbox.configure(fg=self.problem_color)
                 elif is_completed:
                     self.label.configure(foreground=self.completed_color)
                     self.checkbox.configure(fg=self.completed_color)
@@ -0,0 +1,153 @@
+# models/progress_model.py
+import bisect
+
+
+def count_prefix(sorted_names, prefix):
+    """Count the names starting with prefix in a sorted list, in O(log n)"""
+    lo = bisect.bisect_left(sorted_names, prefix)
+    # Every name with the prefix sorts below the prefix with its last
+    # character bumped by one
+    hi = bisect.bisect_left(sorted_names, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    return hi - lo
+
+
+class SortedNameSet:
+    """Sorted list of file names with O(1) membership and O(log n) neighbour lookup"""
+
+    def __init__(self, names=()):
+        self._names = sorted(names)
+        self._members = set(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def add(self, name):
+        if name not in self._members:
+            self._members.add(name)
+            bisect.insort(self._names, name)
+
+    def discard(self, name):
+        if name in self._members:
+            self._members.remove(name)
+            del self._names[bisect.bisect_left(self._names, name)]
+
+    def next_after(self, name):
+        """Return the first member sorting after name, or None"""
+        i = bisect.bisect_right(self._names, name)
+        return self._names[i] if i < len(self._names) else None
+
+    def prev_before(self, name):
+        """Return the last member sorting before name, or None"""
+        i = bisect.bisect_left(self._names, name)
+        return self._names[i - 1] if i > 0 else None
+
+    def first(self):
+        return self._names[0] if self._names else None
+
+    def count_prefix(self, prefix):
+        """Count the members starting with prefix"""
+        return count_prefix(self._names, prefix)
+
+    def last(self):
+        return self._names[-1] if self._names else None
+
+
+class ProgressModel:
+    """Completed/flagged/unfinished sets over FileHandler.pdf_files.
+
+    Kept up to date one file at a time as notes and flags change, so the
+    counters are O(1) and jumping to the next unfinished or flagged file is
+    O(log n) instead of walking the list. Files are tracked by name, which
+    relies on pdf_files being kept sorted.
+    """
+
+    def __init__(self, file_handler):
+        self.file_handler = file_handler
+        self.completed = SortedNameSet()
+        self.flagged = SortedNameSet()
+        self.unfinished = SortedNameSet()
+
+    @property
+    def total(self):
+        return len(self.file_handler.pdf_files)
+
+    def rebuild(self):
+        """Recompute every set from the listing (on directory load)"""
+        notes_dict = self.file_handler.notes_dict
+        flags_dict = self.file_handler.flags_dict
+        pdf_files = self.file_handler.pdf_files
+        self.completed = SortedNameSet(f for f in pdf_files if notes_dict.get(f))
+        self.flagged = SortedNameSet(f for f in pdf_files if flags_dict.get(f))
+        self.unfinished = SortedNameSet(f for f in pdf_files if not notes_dict.get(f))
+
+    def is_listed(self, pdf_file):
+        pdf_files = self.file_handler.pdf_files
+        i = bisect.bisect_left(pdf_files, pdf_file)
+        return i < len(pdf_files) and pdf_files[i] == pdf_file
+
+    def update(self, pdf_file):
+        """Re-file one PDF after its note or flag changed"""
+        if not self.is_listed(pdf_file):
+            self.remove(pdf_file)
+            return
+        if self.file_handler.notes_dict.get(pdf_file):
+            self.completed.add(pdf_file)
+            self.unfinished.discard(pdf_file)
+        else:
+            self.completed.discard(pdf_file)
+            self.unfinished.add(pdf_file)
+        if self.file_handler.flags_dict.get(pdf_file, False):
+            self.flagged.add(pdf_file)
+        else:
+            self.flagged.discard(pdf_file)
+
+    def remove(self, pdf_file):
+        """Forget a PDF that is no longer listed"""
+        self.completed.discard(pdf_file)
+        self.flagged.discard(pdf_file)
+        self.unfinished.discard(pdf_file)
+
+    def folder_counts(self, folder):
+        """Return (completed, total) for the PDFs in folder and its subfolders"""
+        prefix = folder + "/"
+        return (
+            self.completed.count_prefix(prefix),
+            count_prefix(self.file_handler.pdf_files, prefix),
+        )
+
+    def index_of(self, pdf_file):
+        """Return the index of pdf_file in pdf_files, or -1"""
+        pdf_files = self.file_handler.pdf_files
+        i = bisect.bisect_left(pdf_files, pdf_file)
+        if i < len(pdf_files) and pdf_files[i] == pdf_file:
+            return i
+        return -1
+
+    def _step(self, names, index, forward, wrap):
+        pdf_files = self.file_handler.pdf_files
+        if not names:
+            return -1
+        if 0 <= index < len(pdf_files):
+            current = pdf_files[index]
+            found = names.next_after(current) if forward else names.prev_before(current)
+        else:
+            found = None
+            wrap = True
+        if found is None and wrap:
+            found = names.first() if forward else names.last()
+        return self.index_of(found) if found is not None else -1
+
+    def next_unfinished(self, index, wrap=True):
+        return self._step(self.unfinished, index, True, wrap)
+
+    def previous_unfinished(self, index, wrap=True):
+        return self._step(self.unfinished, index, False, wrap)
+
+    def next_flagged(self, index, wrap=True):
+        return self._step(self.flagged, index, True, wrap)
@@ -0,0 +1,129 @@
+# models/search_index.py
+import bisect
+
+# Entries per block; a block is split once it grows past twice this
+BLOCK_SIZE = 512
+
+
+class _Block:
+    __slots__ = ("names", "keys", "text")
+
+    def __init__(self, names, keys):
+        self.names = names
+        self.keys = keys
+        self.text = None  # keys joined by newlines, rebuilt on demand
+
+    def haystack(self):
+        if self.text is None:
+            self.text = "\n".join(self.keys)
+        return self.text
+
+
+class SearchIndex:
+    """Case-insensitive substring index over file names and notes.
+
+    The listing is cut into sorted blocks of a few hundred entries, each
+    keeping its "name<TAB>note" keys joined into one string. A query first
+    tests each block's string, which is a single C-level scan, and only
+    checks the entries of blocks that contain it. Saving a note re-keys one
+    entry and marks its block for re-joining, and files coming and going
+    are inserted into or dropped from their block, so the index never has
+    to be rebuilt while a directory is open.
+    """
+
+    def __init__(self, file_handler, block_size=BLOCK_SIZE):
+        self.file_handler = file_handler
+        self.block_size = block_size
+        self._blocks = []
+        self._firsts = []  # first name of each block, for bisecting
+
+    def __len__(self):
+        return sum(len(block.names) for block in self._blocks)
+
+    def _key(self, pdf_file):
+        note = self.file_handler.notes_dict.get(pdf_file) or ""
+        return f"{pdf_file}\t{note}".lower()
+
+    def rebuild(self):
+        """Index every listed file (on directory load)"""
+        pdf_files = self.file_handler.pdf_files
+        self._blocks = []
+        for start in range(0, len(pdf_files), self.block_size):
+            names = pdf_files[start:start + self.block_size]
+            self._blocks.append(_Block(names, [self._key(name) for name in names]))
+        self._firsts = [block.names[0] for block in self._blocks]
+
+    def _locate(self, pdf_file):
+        """Return (block number, position in block, whether it is indexed)"""
+        b = max(0, bisect.bisect_right(self._firsts, pdf_file) - 1)
+        names = self._blocks[b].names
+        i = bisect.bisect_left(names, pdf_file)
+        return b, i, i < len(names) and names[i] == pdf_file
+
+    def add(self, names):
+        """Index newly listed files"""
+        for pdf_file in names:
+            if not self._blocks:
+                self._blocks.append(_Block([pdf_file], [self._key(pdf_file)]))
+                self._firsts.append(pdf_file)
+                continue
+            b, i, found = self._locate(pdf_file)
+            if found:
+                continue
+            block = self._blocks[b]
+            block.names.insert(i, pdf_file)
+            block.keys.insert(i, self._key(pdf_file))
+            block.text = None
+            if i == 0:
+                self._firsts[b] = pdf_file
+            if len(block.names) > 2 * self.block_size:
+                half = len(block.names) // 2
+                tail = _Block(block.names[half:], block.keys[half:])
+                del block.names[half:]
+                del block.keys[half:]
+                block.text = None
+                self._blocks.insert(b + 1, tail)
+                self._firsts.insert(b + 1, tail.names[0])
+
+    def remove(self, names):
+        """Forget files that are no longer listed"""
+        for pdf_file in names:
+            if not self._blocks:
+                return
+            b, i, found = self._locate(pdf_file)
+            if not found:
+                continue
+            block = self._blocks[b]
+            del block.names[i]
+            del block.keys[i]
+            block.text = None
+            if not block.names:
+                del self._blocks[b]
+                del self._firsts[b]
+            elif i == 0:
+                self._firsts[b] = block.names[0]
+
+    def update(self, pdf_file):
+        """Re-key one file after its note changed"""
+        if not self._blocks:
+            return
+        b, i, found = self._locate(pdf_file)
+        if found:
+            block = self._blocks[b]
+            key = self._key(pdf_file)
+            if block.keys[i] != key:
+                block.keys[i] = key
+                block.text = None
+
+    def search(self, query):
+        """Return the files whose name or note contains query, in listing order"""
+        query = query.lower().replace("\t", "").replace("\n", "")
+        if not query:
+            return [name for block in self._blocks for name in block.names]
+        found = []
+        for block in self._blocks:
+            if query in block.haystack():
+                found.extend(
+                    name for name, key in zip(block.names, block.keys) if query in key
+                )
+        return found
@@ -0,0 +1,171 @@
+"""Headless batch pre-render of the viewer's top-right crops.
+
+Renders every PDF in a directory with a process pool and stores the crops
+in the directory's crop cache (shared with the viewer) and/or exports them
+as PNG files, e.g. for re-running OCR. Files already cached/exported are
+skipped, so an interrupted run can simply be started again.
+
+    python prerender.py /path/to/batch [--export crops/] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.crop_cache import DiskCropCache, encode_png
+from utils.file_handler import FileHandler
+from utils.pdf_renderer import COLOR_MODES, RENDER_MODES, PDFRenderer
+from utils.user_config import directory_setting
+
+_renderer = None
+
+
+def _init_worker(color_mode, render_mode):
+    global _renderer
+    _renderer = PDFRenderer()
+    _renderer.color_mode = color_mode
+    _renderer.render_mode = render_mode
+
+
+def _render_one(pdf_path):
+    """Render one crop in a worker process; returns (pdf_path, png bytes or None, error)"""
+    try:
+        return pdf_path, encode_png(_renderer.render_image(pdf_path)), None
+    except Exception as e:
+        return pdf_path, None, str(e)
+
+
+def export_path(export_dir, pdf_file):
+    return os.path.join(export_dir, os.path.splitext(pdf_file)[0] + ".png")
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pre-render the viewer's crops for every PDF in a directory"
+    )
+    parser.add_argument("directory", help="directory of PDFs to render")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="render processes to run (default: number of CPU cores)",
+    )
+    parser.add_argument(
+        "--export", metavar="DIR", help="also write each crop to DIR as a PNG file"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not write crops into the viewer's crop cache",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=int,
+        help="size limit of the crop cache (default: the viewer's limit)",
+    )
+    parser.add_argument(
+        "--color-mode",
+        choices=COLOR_MODES,
+        help="render mode (default: the mode chosen for the directory in the viewer)",
+    )
+    parser.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default="auto",
+        help="rasterization mode; match the viewer's --render-mode so it "
+             "finds the cached crops (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="empty the directory's crop cache before rendering",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    directory = os.path.abspath(args.directory)
+    if args.no_cache and not args.export:
+        sys.exit("Nothing to do: --no-cache without --export")
+
+    file_handler = FileHandler()
+    pdf_files = sorted(f for f in os.listdir(directory) if file_handler.is_valid_pdf(f))
+
+    color_mode = args.color_mode or directory_setting(directory, "color_mode", "rgb")
+    renderer = PDFRenderer()
+    renderer.color_mode = color_mode if color_mode in COLOR_MODES else "rgb"
+    renderer.render_mode = args.render_mode
+    cache = None if args.no_cache else DiskCropCache(directory, renderer)
+    if cache and args.cache_size_mb:
+        cache.max_bytes = args.cache_size_mb * 1024 * 1024
+    if cache and args.clear_cache:
+        cache.invalidate()
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+
+    # Resume: skip everything that already has all requested outputs
+    todo = []
+    for pdf_file in pdf_files:
+        pdf_path = os.path.join(directory, pdf_file)
+        cached = cache is None or cache.contains(pdf_path)
+        exported = not args.export or os.path.exists(export_path(args.export, pdf_file))
+        if not (cached and exported):
+            todo.append(pdf_path)
+
+    skipped = len(pdf_files) - len(todo)
+    print(
+        f"{len(pdf_files)} PDFs, {skipped} already done, "
+        f"rendering {len(todo)} with {args.workers} workers"
+    )
+    if not todo:
+        return
+
+    done = failed = 0
+    start = last_report = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(renderer.color_mode, renderer.render_mode),
+    ) as pool:
+        for pdf_path, data, error in pool.map(_render_one, todo, chunksize=4):
+            pdf_file = os.path.basename(pdf_path)
+            if data is None:
+                failed += 1
+                print(f"Error rendering {pdf_file}: {error}")
+            else:
+                if cache:
+                    key = cache.key_for(pdf_path)
+                    if key:
+                        cache.put_encoded(key, data)
+                if args.export:
+                    write_atomic(export_path(args.export, pdf_file), data)
+            done += 1
+
+            now = time.perf_counter()
+            if now - last_report >= 2 or done == len(todo):
+                last_report = now
+                rate = done / (now - start)
+                eta = (len(todo) - done) / rate if rate else 0
+                print(
+                    f"{done}/{len(todo)} rendered, {rate:.1f} docs/s, "
+                    f"ETA {eta:.0f}s"
+                )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Finished {done - failed} crops ({failed} failed) in {elapsed:.1f}s, "
+        f"{done / elapsed:.1f} docs/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Headless reconciliation of the OCR app's CSV with the viewer's notes.
+
+Streams the OCR output, the batch's notes (pdf_notes.csv plus its journal,
+or pdf_notes.db in shared mode) and the directory listing through one
+external sort, so memory stays bounded whatever the batch size, and writes
+one row per PDF with a status:
+
+    agree     the note matches the OCR value
+    override  the operator's note replaces a different OCR value
+    manual    the operator's note, where the OCR had no value
+    ocr       no note; the OCR value is confident enough to keep
+    review    no note; the OCR value is below --min-confidence
+    missing   no note and no OCR value
+
+--worklist writes the names of the listed PDFs still needing review or
+missing their number, to open in the viewer with main.py --worklist FILE:
+
+    python reconcile.py ocr.csv /path/to/batch --worklist todo.txt
+"""
+import argparse
+import csv
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from utils.directory_scanner import scan_pdf_names
+from utils.external_sort import DEFAULT_CHUNK_ROWS, sorted_rows
+from utils.file_handler import FileHandler
+from utils.notes_journal import NotesJournal
+from utils.notes_shards import read_csv_rows
+from utils.shared_store import db_path
+
+OUTPUT_HEADER = ["PDF File", "OCR Value", "OCR Confidence", "Note", "Flagged", "Status"]
+STATUSES = ("agree", "override", "manual", "ocr", "review", "missing")
+WORKLIST_STATUSES = ("review", "missing")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Join the OCR app's CSV with the notes of a batch directory"
+    )
+    parser.add_argument("ocr_csv", help="CSV written by the OCR app")
+    parser.add_argument("directory", help="batch directory holding the PDFs and pdf_notes.csv")
+    parser.add_argument(
+        "--output",
+        metavar="CSV",
+        help="merged CSV to write (default: pdf_reconciled.csv in the directory)",
+    )
+    parser.add_argument(
+        "--worklist",
+        metavar="FILE",
+        help="also write the PDFs still needing a number, one per line",
+    )
+    parser.add_argument(
+        "--file-column",
+        default="File",
+        help="OCR column with the PDF file name or path (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--value-column",
+        default="Citation",
+        help="OCR column with the citation number read (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--confidence-column",
+        default="Confidence",
+        help="OCR column with the read's confidence; without it every OCR "
+             "value is trusted (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.9,
+        help="OCR values below this confidence go to review, in the OCR's "
+             "own scale (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="rows sorted in memory at a time (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def normalize(value):
+    return (value or "").strip().upper()
+
+
+def parse_confidence(value):
+    """Return the confidence as a float ("93%" -> 93.0), or None if unreadable"""
+    try:
+        return float(value.strip().rstrip("%"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def find_column(header, name, required=True):
+    """Return the index of column name (case-insensitive), or None"""
+    wanted = name.strip().lower()
+    for i, column in enumerate(header):
+        if column.strip().lower() == wanted:
+            return i
+    if required:
+        sys.exit(f"OCR CSV has no {name!r} column (columns: {', '.join(header)})")
+    return None
+
+
+def ocr_rows(path, args):
+    """Yield [file, "ocr", value, confidence] for every row of the OCR CSV"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        file_col = find_column(header, args.file_column)
+        value_col = find_column(header, args.value_column)
+        conf_col = find_column(header, args.confidence_column, required=False)
+        if conf_col is None:
+            print(f"No {args.confidence_column!r} column; trusting every OCR value")
+        for row in reader:
+            if len(row) <= max(file_col, value_col):
+                continue
+            # The OCR app may record full paths; the viewer keys on names
+            name = os.path.basename(row[file_col].strip().replace("\\", "/"))
+            if not name:
+                continue
+            confidence = row[conf_col] if conf_col is not None and conf_col < len(row) else ""
+            yield [name, "ocr", normalize(row[value_col]), confidence]
+
+
+def csv_note_rows(directory):
+    """Yield note rows from pdf_notes.csv followed by its uncompacted journals.
+
+    Rows are [file, kind, note or "", flagged or "", stamp]; reconcile()
+    keeps the note and flag with the newest stamp, and on equal stamps the
+    stable sort keeps journal rows after the CSV's, so they win.
+    """
+    for pdf_file, note, flagged, note_stamp, flag_stamp in read_csv_rows(directory):
+        yield [pdf_file, "note", note, "", note_stamp]
+        if flagged is not None:
+            yield [pdf_file, "flag", "", "1" if flagged else "0", flag_stamp]
+    for kind, pdf_file, value, stamp in NotesJournal(directory).replay_all():
+        if kind == "note":
+            yield [pdf_file, "note", value, "", stamp]
+        elif kind == "flag":
+            yield [pdf_file, "flag", "", value, stamp]
+
+
+def db_note_rows(directory):
+    """Yield note rows from the shared store, read-only"""
+    uri = "file:" + db_path(directory).replace("\\", "/") + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=10)
+    try:
+        for pdf_file, note, flagged in conn.execute(
+            "SELECT pdf_file, note, flagged FROM notes"
+        ):
+            yield [pdf_file, "db", note or "", "1" if flagged else "0"]
+    finally:
+        conn.close()
+
+
+def listing_rows(directory):
+    is_valid_pdf = FileHandler().is_valid_pdf
+    for name in scan_pdf_names(directory, is_valid_pdf):
+        yield [name, "listed", "", ""]
+
+
+def reconcile(group, min_confidence):
+    """Fold the sorted rows of one file into its output row and status"""
+    listed = False
+    ocr_value = confidence = None
+    note = ""
+    flagged = ""
+    note_stamp = flag_stamp = 0
+    for row in group:
+        kind, value, extra = row[1:4]
+        if kind == "listed":
+            listed = True
+        elif kind == "ocr":
+            # A file read twice keeps its last read
+            ocr_value, confidence = value, extra
+        else:
+            # Shared-store rows carry no stamp; they are the only source then
+            stamp = int(row[4]) if len(row) > 4 else 0
+            if kind != "flag" and stamp >= note_stamp:
+                note, note_stamp = normalize(value), stamp
+            if extra and stamp >= flag_stamp:
+                flagged, flag_stamp = extra, stamp
+
+    if note:
+        if not ocr_value:
+            status = "manual"
+        elif note == ocr_value:
+            status = "agree"
+        else:
+            status = "override"
+    elif not ocr_value:
+        status = "missing"
+    else:
+        score = parse_confidence(confidence)
+        if confidence and (score is None or score < min_confidence):
+            status = "review"
+        else:
+            status = "ocr"
+    return listed, [ocr_value or "", confidence or "", note, flagged, status]
+
+
+def write_atomic_csv(path, header, rows):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def main():
+    args = parse_args()
+    directory = os.path.abspath(args.directory)
+    output = args.output or os.path.join(directory, "pdf_reconciled.csv")
+    if not os.path.isdir(directory):
+        sys.exit(f"Not a directory: {directory}")
+    if args.chunk_rows < 1:
+        sys.exit("--chunk-rows must be at least 1")
+
+    if os.path.exists(db_path(directory)):
+        notes = db_note_rows(directory)
+    else:
+        notes = csv_note_rows(directory)
+    rows = itertools.chain(listing_rows(directory), notes, ocr_rows(args.ocr_csv, args))
+
+    counts = Counter()  # per status, plus "worklist" for the names written
+    start = time.perf_counter()
+    worklist_tmp = f"{args.worklist}.{os.getpid()}.tmp" if args.worklist else None
+    try:
+        with sorted_rows(rows, chunk_rows=args.chunk_rows) as merged, \
+                open(worklist_tmp or os.devnull, "w", encoding="utf-8") as worklist:
+
+            def output_rows():
+                for pdf_file, group in itertools.groupby(merged, key=lambda row: row[0]):
+                    listed, row = reconcile(group, args.min_confidence)
+                    counts[row[-1]] += 1
+                    # Only files in the directory can be opened in the viewer
+                    if listed and row[-1] in WORKLIST_STATUSES:
+                        worklist.write(pdf_file + "\n")
+                        counts["worklist"] += 1
+                    yield [pdf_file] + row
+
+            write_atomic_csv(output, OUTPUT_HEADER, output_rows())
+        if worklist_tmp:
+            os.replace(worklist_tmp, args.worklist)
+    except (OSError, sqlite3.Error) as e:
+        if worklist_tmp and os.path.exists(worklist_tmp):
+            os.remove(worklist_tmp)
+        sys.exit(f"Error reconciling: {e}")
+
+    total = sum(counts[status] for status in STATUSES)
+    elapsed = time.perf_counter() - start
+    print(f"{total} PDFs reconciled in {elapsed:.1f}s -> {output}")
+    for status in STATUSES:
+        print(f"  {status:<9}{counts[status]}")
+    if args.worklist:
+        print(f"{counts['worklist']} PDFs to review written to {args.worklist}")
+
+
+if __name__ == "__main__":
+    main()
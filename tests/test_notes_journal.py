@@ -0,0 +1,136 @@
+# tests/test_notes_journal.py
+import os
+
+from utils.notes_journal import JOURNAL_NAME, NotesJournal, journal_name
+from utils.notes_shards import NOTES_NAME, read_notes, write_notes_csv
+
+
+def compact(directory, notes, flags, journal, listed=()):
+    """Fold a viewer's state into pdf_notes.csv, as FileHandler.compact() does"""
+    names = sorted(set(listed) | set(notes) | set(flags))
+    rows = [(name, notes.get(name, ""), flags.get(name, False)) for name in names]
+    assert write_notes_csv(directory, rows, journal.stamps)
+    assert journal.truncate()
+
+
+def save(notes, journal, pdf_file, note):
+    notes[pdf_file] = note
+    journal.append("note", pdf_file, note)
+
+
+def test_older_journal_does_not_replay_over_newer_csv(tmp_path):
+    directory = str(tmp_path)
+    bob = read_notes(directory, "bob@b")
+    save(bob[0], bob[2], "f.pdf", "X")
+
+    notes, flags, alice = read_notes(directory, "alice@a")
+    assert notes == {"f.pdf": "X"}
+    save(notes, alice, "f.pdf", "Y")
+    compact(directory, notes, flags, alice)
+
+    assert read_notes(directory, "carol@c")[0] == {"f.pdf": "Y"}
+
+
+def test_interleaved_edits_keep_the_newest_per_file(tmp_path):
+    directory = str(tmp_path)
+    _, _, alice = read_notes(directory, "alice@a")
+    _, _, bob = read_notes(directory, "bob@b")
+    alice.append("note", "a.pdf", "A1")
+    bob.append("note", "a.pdf", "B1")
+    bob.append("note", "b.pdf", "B2")
+    # alice's journal is now the most recently written one
+    alice.append("note", "b.pdf", "A2")
+
+    assert read_notes(directory, "carol@c")[0] == {"a.pdf": "B1", "b.pdf": "A2"}
+
+
+def test_compaction_keeps_newer_values_compacted_by_another_viewer(tmp_path):
+    directory = str(tmp_path)
+    alice_notes, alice_flags, alice = read_notes(directory, "alice@a")
+    bob_notes, bob_flags, bob = read_notes(directory, "bob@b")
+    save(alice_notes, alice, "a.pdf", "A1")
+    save(bob_notes, bob, "b.pdf", "B1")
+    bob_flags["a.pdf"] = True
+    bob.append("flag", "a.pdf", "1")
+    compact(directory, bob_notes, bob_flags, bob)
+    # alice never saw bob's changes, but they must survive her rewrite
+    compact(directory, alice_notes, alice_flags, alice)
+
+    notes, flags, _ = read_notes(directory, "carol@c")
+    assert notes == {"a.pdf": "A1", "b.pdf": "B1"}
+    assert flags["a.pdf"] is True
+
+
+def test_clearing_a_note_wins_over_an_older_note(tmp_path):
+    directory = str(tmp_path)
+    _, _, bob = read_notes(directory, "bob@b")
+    bob.append("note", "f.pdf", "X")
+    notes, flags, alice = read_notes(directory, "alice@a")
+    save(notes, alice, "f.pdf", "")
+    del notes["f.pdf"]
+    compact(directory, notes, flags, alice, listed=["f.pdf"])
+
+    assert read_notes(directory, "carol@c")[0] == {}
+
+
+def test_torn_record_is_ignored_and_next_append_survives(tmp_path):
+    directory = str(tmp_path)
+    _, _, journal = read_notes(directory, "alice@a")
+    journal.append("note", "a.pdf", "A1")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write("note,b.pdf,B")  # crash mid-write
+
+    notes, _, journal = read_notes(directory, "alice@a")
+    assert notes == {"a.pdf": "A1"}
+    assert journal.records == 1
+    journal.append("note", "c.pdf", "C1")
+    journal.close()
+    assert read_notes(directory, "alice@a")[0] == {"a.pdf": "A1", "c.pdf": "C1"}
+
+
+def test_unstamped_files_still_load(tmp_path):
+    directory = str(tmp_path)
+    with open(os.path.join(directory, NOTES_NAME), "w", encoding="utf-8") as f:
+        f.write("PDF File,Note,Flagged\r\na.pdf,A1,1\r\nb.pdf,B1,0\r\n")
+    with open(os.path.join(directory, JOURNAL_NAME), "w", encoding="utf-8") as f:
+        f.write("note,b.pdf,B2,end\r\n")
+
+    notes, flags, journal = read_notes(directory, "alice@a")
+    assert notes == {"a.pdf": "A1", "b.pdf": "B2"}
+    assert flags == {"a.pdf": True, "b.pdf": False}
+    # Compaction folds the old shared journal in and removes it
+    compact(directory, notes, flags, journal)
+    assert not os.path.exists(os.path.join(directory, JOURNAL_NAME))
+    assert read_notes(directory, "alice@a")[0] == {"a.pdf": "A1", "b.pdf": "B2"}
+
+
+def test_truncate_reports_a_failed_removal(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    _, _, journal = read_notes(directory, "alice@a")
+    journal.append("note", "a.pdf", "A1")
+
+    def refuse(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(os, "remove", refuse)
+    assert journal.truncate() is False
+    assert journal.records == 1
+    assert os.path.exists(os.path.join(directory, journal_name("alice@a")))
+
+
+def test_truncate_leaves_other_journals_alone(tmp_path):
+    directory = str(tmp_path)
+    _, _, alice = read_notes(directory, "alice@a")
+    _, _, bob = read_notes(directory, "bob@b")
+    alice.append("note", "a.pdf", "A1")
+    bob.append("note", "b.pdf", "B1")
+    assert alice.truncate()
+    bob.append("note", "c.pdf", "C1")
+    bob.close()
+
+    journal = NotesJournal(directory, "bob@b")
+    assert [record[:3] for record in journal.replay()] == [
+        ("note", "b.pdf", "B1"),
+        ("note", "c.pdf", "C1"),
+    ]
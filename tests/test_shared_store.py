@@ -0,0 +1,28 @@
+# tests/test_shared_store.py
+from utils.shared_store import SharedNotesStore
+
+
+def files(store):
+    return [row[0] for row in store.conn.execute("SELECT pdf_file FROM files ORDER BY pdf_file")]
+
+
+def test_unregistered_files_are_not_claimed(tmp_path):
+    store = SharedNotesStore(str(tmp_path), "alice@a")
+    store.register_files(["a.pdf", "b.pdf"])
+    store.unregister_files(["a.pdf"])
+    assert store.claim_next() == "b.pdf"
+    store.close()
+
+
+def test_sync_files_prunes_rows_and_claims_for_missing_files(tmp_path):
+    alice = SharedNotesStore(str(tmp_path), "alice@a")
+    bob = SharedNotesStore(str(tmp_path), "bob@b")
+    alice.register_files(["a.pdf", "b.pdf"])
+    assert bob.claim_next() == "a.pdf"
+
+    alice.sync_files(["b.pdf", "c.pdf"])
+    assert files(alice) == ["b.pdf", "c.pdf"]
+    assert alice.conn.execute("SELECT COUNT(*) FROM claims").fetchone()[0] == 0
+    assert alice.claim_next() == "b.pdf"
+    alice.close()
+    bob.close()
@@ -1,28 +1,72 @@
 # ui/app.py
+import threading
 import tkinter as tk
 from tkinter import ttk
 from .sidebar import Sidebar
 from .pdf_viewer import PDFViewer
 from utils.file_handler import FileHandler
+from utils.main_thread import MainThreadDispatcher
+from utils.memory_budget import MemoryBudget
+from utils.pdf_renderer import preload_libraries
+from utils.session import load_session, save_session
+
+# How often to pick up other operators' changes in shared mode (ms)
+SHARED_POLL_INTERVAL = 2000
+# How often the current position is saved for the next launch (ms)
+SESSION_SAVE_INTERVAL = 30000
 
 class PDFViewerApp:
-    def __init__(self, root):
+    def __init__(self, root, shared=False, operator=None,
+                 citation_pattern=None, memory_mb=None,
+                 read_ahead=None, restore_session=True, worklist=None, recursive=False,
+                 render_mode="auto"):
         self.root = root
+        self._restore_name = None  # document to reselect once its directory is listed
+        self._saved_position = None
+        self._session_save_id = None
+        self.read_ahead = read_ahead
+        self.render_mode = render_mode
+        self.citation_pattern = citation_pattern
+        self.memory_budget = (
+            MemoryBudget(memory_mb * 1024 * 1024) if memory_mb else MemoryBudget()
+        )
         self.root.title("PDF Directory Viewer")
         self.root.geometry("1400x800")
         
+        self.dispatcher = MainThreadDispatcher(self.root)
+
         self.file_handler = FileHandler()
+        self.file_handler.dispatcher = self.dispatcher
         self.file_handler.set_directory_callback(self.on_directory_selected)
+        self.file_handler.set_files_changed_callback(self.on_files_changed)
+        self.file_handler.set_files_added_callback(self.on_files_added)
+        self.file_handler.set_files_modified_callback(self.on_files_modified)
+        if shared:
+            self.file_handler.storage_backend = "sqlite"
+        if operator:
+            self.file_handler.operator = operator
+        if worklist is not None:
+            self.file_handler.worklist = worklist
+        self.file_handler.recursive = recursive and not shared
         
         self.setup_styles()
         self.setup_ui()
         self.bind_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(SHARED_POLL_INTERVAL, self.poll_shared_changes)
+        # The window is up before fitz/PIL are loaded; load them while the
+        # operator is still picking a directory
+        self.root.after(100, self.preload_libraries)
+        if restore_session:
+            self.root.after(0, self.restore_session)
+        self.root.after(SESSION_SAVE_INTERVAL, self.save_position)
         
     def setup_styles(self):
         style = ttk.Style()
         style.configure('Consolas.TEntry', font=('Consolas', 24))
         style.configure('Sidebar.TFrame', background='#2F2F2F')
         style.configure('SidebarButton.TButton', font=('Arial', 10))
+        style.configure('Sidebar.TCheckbutton', background='#2F2F2F', foreground='white')
         style.configure('Counter.TLabel', 
                        background='#2F2F2F',
                        foreground='white',
@@ -37,11 +81,18 @@ class PDFViewerApp:
         self.sidebar = Sidebar(self.root, self.file_handler)
         
         # Create PDF viewer
-        self.pdf_viewer = PDFViewer(self.root, self.file_handler)
+        self.pdf_viewer = PDFViewer(
+            self.root,
+            self.file_handler,
+            citation_pattern=self.citation_pattern,
+            memory_budget=self.memory_budget,
+            read_ahead=self.read_ahead,
+        )
         
         # Connect sidebar and PDF viewer
         self.sidebar.set_pdf_viewer(self.pdf_viewer)
         self.pdf_viewer.set_sidebar(self.sidebar)
+        self.pdf_viewer.pdf_renderer.render_mode = self.render_mode
     
     def bind_shortcuts(self):
         self.root.bind('<Control-n>', lambda e: self.sidebar.next_pdf())
@@ -52,12 +103,154 @@ class PDFViewerApp:
         self.root.bind('<Down>', lambda e: self.sidebar.next_pdf())
         self.root.bind('<Control-f>', lambda e: self.sidebar.toggle_flag())
         self.root.bind('<Control-F>', lambda e: self.sidebar.toggle_flag())
+        self.root.bind('<Control-r>', lambda e: self.pdf_viewer.rerender_current())
+        self.root.bind('<Control-R>', lambda e: self.pdf_viewer.rerender_current())
+        self.root.bind('<Control-i>', lambda e: self.pdf_viewer.toggle_inspect())
+        self.root.bind('<Control-I>', lambda e: self.pdf_viewer.toggle_inspect())
+        self.root.bind('<Control-m>', lambda e: self.pdf_viewer.cycle_color_mode())
+        self.root.bind('<Control-M>', lambda e: self.pdf_viewer.cycle_color_mode())
+        self.root.bind('<Control-Down>', lambda e: self.sidebar.next_unfinished())
+        self.root.bind('<Control-Up>', lambda e: self.sidebar.previous_unfinished())
+        self.root.bind('<Control-g>', lambda e: self.sidebar.next_flagged())
+        self.root.bind('<Control-G>', lambda e: self.sidebar.next_flagged())
+        self.root.bind('<F2>', lambda e: self.pdf_viewer.toggle_stats_overlay())
+        self.root.bind('<F3>', lambda e: self.pdf_viewer.export_stats())
+        self.root.bind('<Control-j>', lambda e: self.sidebar.claim_next())
+        self.root.bind('<Control-J>', lambda e: self.sidebar.claim_next())
+        self.root.bind('<Control-k>', lambda e: self.sidebar.focus_search())
+        self.root.bind('<Control-K>', lambda e: self.sidebar.focus_search())
+        self.root.bind('<Control-e>', lambda e: self.file_handler.export_csv())
+        self.root.bind('<Control-E>', lambda e: self.file_handler.export_csv())
     
+    def preload_libraries(self):
+        threading.Thread(target=preload_libraries, name="preload", daemon=True).start()
+
+    def restore_session(self):
+        """Reopen the directory and document of the last session"""
+        session = load_session()
+        if not session:
+            return
+        self._restore_name = session.get("current_name")
+        if session.get("recursive") and self.file_handler.storage_backend != "sqlite":
+            self.file_handler.recursive = True
+            self.sidebar.recursive_var.set(True)
+        self.file_handler.restore_directory(
+            session["directory"], session["listing"], session.get("directory_mtime_ns")
+        )
+
+    def save_session(self, save_listing=True):
+        if (
+            not self.file_handler.current_directory
+            or self.file_handler.scanning
+            # A listing still streaming in is not worth caching, and one
+            # cut down to a worklist must not be restored without it; a
+            # workspace is always walked again
+            or self.file_handler.worklist is not None
+            or self.file_handler.recursive
+        ):
+            save_listing = False
+        self._saved_position = self.sidebar.current_pdf_name
+        save_session(
+            self.file_handler.current_directory,
+            self.sidebar.current_pdf_name,
+            self.sidebar.current_pdf_index,
+            self.file_handler.pdf_files,
+            save_listing=save_listing,
+            recursive=self.file_handler.recursive,
+        )
+
+    def save_position(self):
+        # Cheap periodic save of just the position, in case the app is killed
+        if (
+            self.file_handler.current_directory
+            and self.sidebar.current_pdf_name != self._saved_position
+        ):
+            self.save_session(save_listing=False)
+        self.root.after(SESSION_SAVE_INTERVAL, self.save_position)
+
+    def _select_restored(self):
+        """Select the document of the restored session once it is listed"""
+        index = self.file_handler.progress.index_of(self._restore_name)
+        if index >= 0:
+            self._restore_name = None
+            self.sidebar.on_item_click(index)
+            return True
+        if not self.file_handler.scanning:
+            self._restore_name = None
+        return False
+
     def on_directory_selected(self):
+        # Drop crops prerendered for the previous directory
+        self.pdf_viewer.reset_render_ahead(self.file_handler.current_directory)
+        self.pdf_viewer.load_citation_pattern(self.file_handler.current_directory)
+        self.pdf_viewer.text_index.reset(
+            self.file_handler.current_directory, self.file_handler.pdf_files
+        )
+
         # Update sidebar when directory is selected
+        self.sidebar.current_pdf_index = -1
+        self.sidebar.current_pdf_name = None
         self.sidebar.update_pdf_list()
         self.sidebar.update_counter_label()
         
-        # Select first PDF if available
+        if not self.file_handler.scanning:
+            self.schedule_session_save()
+
+        # Select the restored document, or the first PDF if available
+        if self._restore_name and self._select_restored():
+            return
         if self.file_handler.pdf_files:
-            self.sidebar.on_item_click(0)
\ No newline at end of file
+            self.sidebar.on_item_click(0)
+        else:
+            self.pdf_viewer.clear()
+
+    def on_files_changed(self):
+        # More of the listing arrived (or files went away); keep the selection
+        self.sidebar.on_files_changed()
+        if self._restore_name:
+            self._select_restored()
+        if self.sidebar.current_pdf_index < 0 and self.file_handler.pdf_files:
+            self.sidebar.on_item_click(0)
+        if not self.file_handler.scanning:
+            # Keep the cached listing current for a fast restart
+            self.schedule_session_save()
+
+    def on_files_added(self, pdf_files):
+        # Queue the new PDFs for text-layer indexing
+        self.pdf_viewer.text_index.add(pdf_files)
+
+    def on_files_modified(self, pdf_files):
+        # A PDF was rewritten in place; drop its stale crop
+        self.pdf_viewer.on_files_modified(pdf_files)
+
+    def poll_shared_changes(self):
+        # Pick up notes and flags other operators saved to the shared store
+        self.file_handler.poll_shared_changes(self.on_shared_changes)
+        self.root.after(SHARED_POLL_INTERVAL, self.poll_shared_changes)
+
+    def on_shared_changes(self, changed):
+        for pdf_file in changed:
+            self.sidebar.refresh_item(pdf_file)
+        self.sidebar.update_counter_label()
+        self.pdf_viewer.update_note_display()
+
+    def schedule_session_save(self):
+        # Coalesce bursts of watcher events into one write
+        if self._session_save_id:
+            self.root.after_cancel(self._session_save_id)
+        self._session_save_id = self.root.after(2000, self._save_session_now)
+
+    def _save_session_now(self):
+        self._session_save_id = None
+        self.save_session()
+
+    def on_close(self):
+        if self.file_handler.current_directory:
+            self.save_session()
+        # Fold the notes journal into pdf_notes.csv before exiting
+        self.file_handler.close()
+        self.pdf_viewer.render_ahead.shutdown()
+        self.pdf_viewer.document_pool.shutdown()
+        self.pdf_viewer.inspect_view.shutdown()
+        self.pdf_viewer.text_index.stop()
+        self.root.destroy()
@@ -0,0 +1,272 @@
+# ui/inspect_view.py
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+from utils.memory_budget import image_bytes
+from utils.tile_renderer import ZOOM_LEVELS, TileRenderer
+
+
+class InspectView:
+    """Zoom-and-pan view of the whole current PDF on the viewer's canvas.
+
+    Used when the top-right crop is ambiguous. Only tiles intersecting the
+    viewport (plus a one-tile margin) are rendered, on a background worker;
+    tiles that scroll out of view before their turn are cancelled.
+    """
+
+    def __init__(self, pdf_viewer):
+        self.pdf_viewer = pdf_viewer
+        self.canvas = pdf_viewer.pdf_canvas
+        self.active = False
+        self.tiles = None  # TileRenderer of the inspected PDF
+        self.page_no = 0
+        self.zoom = 1.0
+        self.drawn = {}  # (col, row) -> (canvas item, PhotoImage)
+        self.pending = {}  # (page, zoom, col, row) -> Future
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inspect")
+        self._refresh_scheduled = False
+        self.saved_size = None
+
+        self.status_label = ttk.Label(pdf_viewer.frame, text="", font=("Consolas", 10))
+
+        for sequence, handler in (
+            ("<Escape>", lambda e: self.close()),
+            ("<plus>", lambda e: self.zoom_by(1)),
+            ("<equal>", lambda e: self.zoom_by(1)),
+            ("<KP_Add>", lambda e: self.zoom_by(1)),
+            ("<minus>", lambda e: self.zoom_by(-1)),
+            ("<KP_Subtract>", lambda e: self.zoom_by(-1)),
+            ("<Prior>", lambda e: self.show_page(self.page_no - 1)),
+            ("<Next>", lambda e: self.show_page(self.page_no + 1)),
+            ("<Left>", lambda e: self.scroll(-1, 0)),
+            ("<Right>", lambda e: self.scroll(1, 0)),
+            ("<Up>", lambda e: self.scroll(0, -1)),
+            ("<Down>", lambda e: self.scroll(0, 1)),
+            ("<MouseWheel>", self.on_mouse_wheel),
+            ("<Button-4>", lambda e: self.scroll(0, -1)),
+            ("<Button-5>", lambda e: self.scroll(0, 1)),
+            ("<ButtonPress-1>", self.on_drag_start),
+            ("<B1-Motion>", self.on_drag),
+        ):
+            self.canvas.bind(sequence, self._when_active(handler))
+
+    def _when_active(self, handler):
+        # Canvas bindings stay in place; outside inspection they are no-ops.
+        # "break" keeps the app-wide arrow/Ctrl bindings from also firing.
+        def wrapper(event):
+            if not self.active:
+                return None
+            handler(event)
+            return "break"
+        return wrapper
+
+    def toggle(self, pdf_path):
+        if self.active:
+            self.close()
+        else:
+            self.open(pdf_path)
+        return "break"
+
+    def open(self, pdf_path):
+        """Start inspecting pdf_path from its first page, fitted to the canvas width"""
+        renderer = self.pdf_viewer.pdf_renderer
+        try:
+            self.tiles = TileRenderer(
+                pdf_path,
+                colorspace=renderer.colorspace(),
+                budget=self.pdf_viewer.memory_budget,
+                bilevel_threshold=(
+                    renderer.bilevel_threshold if renderer.color_mode == "bilevel" else None
+                ),
+            )
+        except Exception as e:
+            print(f"Error opening PDF for inspection: {e}")
+            return
+        self.active = True
+        # Renders for the normal crop that are still in flight must not
+        # paint over the inspection view
+        self.pdf_viewer.display_generation += 1
+        self.saved_size = (int(self.canvas.cget("width")), int(self.canvas.cget("height")))
+        self.canvas.configure(width=max(self.saved_size[0], 1200), height=700)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.focus_set()
+        self.page_no = 0
+        self.zoom = self._fit_zoom()
+        self._reset_page()
+
+    def close(self, redisplay=True):
+        """Leave inspection mode and, unless told otherwise, show the crop again"""
+        if not self.active:
+            return
+        self.active = False
+        self._cancel_pending()
+        self.canvas.delete("all")
+        self.drawn.clear()
+        self.pdf_viewer.memory_budget.set_usage("inspect", 0)
+        self.canvas.configure(scrollregion="")
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        if self.saved_size:
+            self.canvas.configure(width=self.saved_size[0], height=self.saved_size[1])
+        self.status_label.pack_forget()
+        tiles, self.tiles = self.tiles, None
+        self.executor.submit(tiles.close)
+        if redisplay:
+            self.pdf_viewer.redisplay_current()
+
+    def _fit_zoom(self):
+        """Largest zoom level at which the page still fits the canvas width"""
+        width = self.tiles.page_rects[self.page_no].width or 1
+        fitting = [z for z in ZOOM_LEVELS if width * z <= int(self.canvas.cget("width"))]
+        return fitting[-1] if fitting else ZOOM_LEVELS[0]
+
+    def _reset_page(self):
+        """Start over at the top-left of the page for a new page or zoom level"""
+        self._cancel_pending()
+        self.canvas.delete("all")
+        self.drawn.clear()
+        self._report_usage()
+        width, height = self.tiles.page_pixels(self.page_no, self.zoom)
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        self.canvas.create_rectangle(0, 0, width, height, fill="#E0E0E0", outline="")
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+        self.update_status()
+        self.schedule_refresh()
+
+    def update_status(self):
+        self.status_label.config(
+            text=f"Page {self.page_no + 1}/{self.tiles.page_count}  "
+                 f"{self.zoom * 100:.0f}%  (+/- zoom, drag or arrows to pan, "
+                 f"PgUp/PgDn page, Esc to exit)"
+        )
+
+    def zoom_by(self, steps):
+        index = min(range(len(ZOOM_LEVELS)), key=lambda i: abs(ZOOM_LEVELS[i] - self.zoom))
+        index = max(0, min(len(ZOOM_LEVELS) - 1, index + steps))
+        if ZOOM_LEVELS[index] == self.zoom:
+            return
+        # Keep the centre of the view where it is
+        x0, x1 = self.canvas.xview()
+        y0, y1 = self.canvas.yview()
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        self.zoom = ZOOM_LEVELS[index]
+        self._reset_page()
+        x0, x1 = self.canvas.xview()
+        y0, y1 = self.canvas.yview()
+        self.canvas.xview_moveto(cx - (x1 - x0) / 2)
+        self.canvas.yview_moveto(cy - (y1 - y0) / 2)
+        self.schedule_refresh()
+
+    def show_page(self, page_no):
+        if 0 <= page_no < self.tiles.page_count and page_no != self.page_no:
+            self.page_no = page_no
+            self._reset_page()
+
+    def scroll(self, dx, dy):
+        if dx:
+            self.canvas.xview_scroll(dx, "units")
+        if dy:
+            self.canvas.yview_scroll(dy, "units")
+        self.schedule_refresh()
+
+    def on_mouse_wheel(self, event):
+        self.scroll(0, -1 if event.delta > 0 else 1)
+
+    def on_drag_start(self, event):
+        self.canvas.scan_mark(event.x, event.y)
+
+    def on_drag(self, event):
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        # Coalesce bursts of drag/scroll events into one tile pass
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            self.canvas.after_idle(self.refresh)
+
+    def refresh(self):
+        """Draw cached tiles in view and queue renders for the missing ones"""
+        self._refresh_scheduled = False
+        if not self.active:
+            return
+        x0 = self.canvas.canvasx(0)
+        y0 = self.canvas.canvasy(0)
+        x1 = x0 + self.canvas.winfo_width()
+        y1 = y0 + self.canvas.winfo_height()
+        wanted = self.tiles.tiles_in(self.page_no, self.zoom, x0, y0, x1, y1)
+
+        # Only tiles around the viewport are kept on the canvas
+        in_view = set(wanted)
+        for col_row in [k for k in self.drawn if k not in in_view]:
+            self.canvas.delete(self.drawn.pop(col_row)[0])
+        self._report_usage()
+
+        # Drop queued renders that scrolled out of view before they started
+        keys = {(self.page_no, self.zoom, col, row) for col, row in wanted}
+        for key, future in list(self.pending.items()):
+            if key not in keys and future.cancel():
+                del self.pending[key]
+
+        dispatcher = self.pdf_viewer.file_handler.dispatcher
+        for col, row in wanted:
+            if (col, row) in self.drawn:
+                continue
+            tile = self.tiles.cached_tile(self.page_no, self.zoom, col, row)
+            if tile is not None:
+                self._draw_tile(col, row, tile)
+                continue
+            key = (self.page_no, self.zoom, col, row)
+            if key in self.pending:
+                continue
+            future = self.executor.submit(self._render, self.tiles, *key)
+            self.pending[key] = future
+            future.add_done_callback(
+                lambda f, key=key: dispatcher.call_soon(self._on_tile, key, f)
+            )
+
+    def _render(self, tiles, page_no, zoom, col, row):
+        try:
+            return tiles.render_tile(page_no, zoom, col, row)
+        except Exception as e:
+            print(f"Error rendering tile: {e}")
+            return None
+
+    def _on_tile(self, key, future):
+        # Renders dropped from pending (e.g. for the previously inspected
+        # PDF, whose keys look the same) are stale
+        if self.pending.get(key) is not future:
+            return
+        del self.pending[key]
+        if future.cancelled() or not self.active:
+            return
+        tile = future.result()
+        page_no, zoom, col, row = key
+        # The page or zoom may have changed while the tile was rendering
+        if tile is not None and (page_no, zoom) == (self.page_no, self.zoom):
+            self._draw_tile(col, row, tile)
+
+    def _draw_tile(self, col, row, tile):
+        x, y, crop = tile
+        photo = tk.PhotoImage(data=crop.data, format="PPM")
+        item = self.canvas.create_image(x, y, anchor=tk.NW, image=photo, tags=("tile",))
+        self.drawn[(col, row)] = (item, photo)
+        self._report_usage()
+
+    def _report_usage(self):
+        # Tiles on the canvas can't be evicted, so the caches make room
+        self.pdf_viewer.memory_budget.set_usage(
+            "inspect", sum(image_bytes(photo) for _, photo in self.drawn.values())
+        )
+
+    def _cancel_pending(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def shutdown(self):
+        self.active = False
+        self._cancel_pending()
+        self.executor.shutdown(wait=False, cancel_futures=True)
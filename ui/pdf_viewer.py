@@ -1,15 +1,59 @@
 # ui/pdf_viewer.py
+import re
 import tkinter as tk
-from tkinter import ttk, messagebox
-from utils.pdf_renderer import PDFRenderer
+import time
+from tkinter import filedialog, ttk, messagebox
+from ui.inspect_view import InspectView
+from utils.crop_cache import DiskCropCache
+from utils.filesystem import is_network_path
+from utils.document_pool import DocumentPool
+from utils.memory_budget import MemoryBudget, image_bytes
+from utils.pdf_renderer import COLOR_MODES, PDFRenderer
+from utils.render_ahead import RenderAhead
+from utils.render_cache import RenderCache
+from utils.render_stats import RenderStats
+from utils.text_index import DEFAULT_CITATION_PATTERN, TextIndex
+from utils.user_config import directory_setting, set_directory_setting
+
+# Files read into memory ahead of the selection when the directory is on a
+# network share (unless set explicitly with main.py --read-ahead)
+READ_AHEAD_FILES = 20
 
 class PDFViewer:
-    def __init__(self, parent, file_handler):
+    def __init__(self, parent, file_handler, citation_pattern=None,
+                 memory_budget=None, read_ahead=None):
         self.parent = parent
         self.file_handler = file_handler
         self.sidebar = None
+        self.render_stats = RenderStats()
         self.pdf_renderer = PDFRenderer()
+        self.pdf_renderer.stats = self.render_stats
+        # Open documents are reused between renders; on network shares the
+        # next files are also read into memory ahead of time. read_ahead=None
+        # picks READ_AHEAD_FILES for shares and 0 for local folders.
+        # Every in-memory image (crop cache, displayed crop, inspection
+        # tiles) and the pooled PDF bytes count against one byte budget
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.document_pool = DocumentPool(budget=self.memory_budget)
+        self.pdf_renderer.documents = self.document_pool
+        self.read_ahead_setting = read_ahead
+        self.read_ahead = read_ahead or 0
+        self.render_cache = RenderCache(budget=self.memory_budget)
+        self.render_ahead = RenderAhead(self.pdf_renderer, self.render_cache)
         self.current_image = None  # Keep track of the current image
+        self.display_generation = 0  # bumped per display_pdf; stale renders are dropped
+        # Citation numbers read from the PDFs' text layers pre-fill the note
+        self.text_index = TextIndex(
+            self.pdf_renderer,
+            file_handler.dispatcher,
+            DEFAULT_CITATION_PATTERN if citation_pattern is None else citation_pattern,
+        )
+        self.text_index.on_found = self.on_text_found
+        self.prefill_value = None
+        # Saved notes are always checked for duplicates, and against a
+        # pattern only when one was configured (see load_citation_pattern)
+        self.citation_pattern = citation_pattern
+        self.save_warning = ""  # problem with the last saved note, if any
         
         self.setup_ui()
 
@@ -44,9 +88,20 @@ class PDFViewer:
         )
         self.pdf_canvas.pack(pady=5, anchor="center")
 
+        self.color_mode_label = ttk.Label(self.frame, text="", font=("Arial", 10))
+        self.color_mode_label.pack()
+        self.update_color_mode_label()
+
         # Shortcuts display
         self.show_shortcuts()
 
+        # Render latency overlay, hidden until toggled
+        self.stats_label = ttk.Label(self.frame, text="", font=("Consolas", 10))
+        self.stats_visible = False
+
+        # Zoom/pan view of the whole document, toggled with Ctrl+I
+        self.inspect_view = InspectView(self)
+
     def setup_note_input(self):
         input_container = ttk.Frame(self.frame)
         input_container.pack(fill=tk.X, pady=(0, 10))
@@ -57,6 +112,7 @@ class PDFViewer:
         # Create StringVar to handle text transformation
         self.note_var = tk.StringVar()
         self.note_var.trace('w', self._enforce_uppercase)
+        self.note_var.trace('w', self._on_note_edited)
 
         self.note_input = ttk.Entry(
             input_frame,
@@ -74,12 +130,52 @@ class PDFViewer:
             command=self.save_note
         ).pack(side=tk.LEFT)
 
+        # Says where a pre-filled note came from; empty otherwise
+        self.prefill_label = ttk.Label(
+            input_container, text="", foreground="#2E7D32", font=("Arial", 11)
+        )
+        self.prefill_label.pack(anchor="center")
+
+        # Duplicate or malformed citation numbers; doesn't block saving
+        self.note_warning_label = ttk.Label(
+            input_container, text="", foreground="#E65100", font=("Arial", 11)
+        )
+        self.note_warning_label.pack(anchor="center")
+
     def _enforce_uppercase(self, *args):
         """Convert input text to uppercase"""
         value = self.note_var.get()
         if value != value.upper():
             self.note_var.set(value.upper())
 
+    def _on_note_edited(self, *args):
+        """Drop the text-layer marker once the operator types something else"""
+        if self.prefill_value is not None and self.note_var.get() != self.prefill_value:
+            self.prefill_value = None
+            self.prefill_label.config(text="")
+
+    def apply_prefill(self, pdf_file):
+        """Pre-fill the note from the text layer if a citation number was found there"""
+        candidates = self.text_index.candidates.get(pdf_file)
+        if not candidates:
+            return
+        self.note_var.set(candidates[0])
+        self.prefill_value = self.note_var.get()
+        text = "From text layer - press Enter to confirm"
+        if len(candidates) > 1:
+            text += f" (also found: {', '.join(candidates[1:4])})"
+        self.prefill_label.config(text=text)
+
+    def on_text_found(self, pdf_file, candidates):
+        """Fill in the current PDF's note if its text layer was read after it was shown"""
+        if (
+            self.sidebar
+            and self.sidebar.current_pdf_name == pdf_file
+            and not self.note_var.get()
+            and not self.file_handler.notes_dict.get(pdf_file)
+        ):
+            self.apply_prefill(pdf_file)
+
     def show_shortcuts(self):
         shortcuts = """
         Keyboard Shortcuts:
@@ -88,7 +184,17 @@ class PDFViewer:
         Ctrl+N: Next PDF
         Ctrl+P: Previous PDF
         Enter: Save Note & Next PDF
+        Ctrl+↓ / Ctrl+↑: Next / Previous unfinished PDF
+        Ctrl+G: Next flagged PDF
         Ctrl+F: Toggle Flag
+        Ctrl+R: Re-render PDF
+        Ctrl+M: Cycle color / grayscale / black-and-white rendering
+        Ctrl+I: Inspect whole PDF (zoom +/-, drag to pan, PgUp/PgDn, Esc)
+        Ctrl+J: Claim next unfinished PDF (shared mode)
+        Ctrl+K: Search file names and notes (Enter jumps to the next match, Esc clears)
+        Ctrl+E: Export notes CSV
+        F2: Toggle render latency overlay
+        F3: Export render latency stats
         """
         ttk.Label(self.frame, text=shortcuts).pack(pady=10)
 
@@ -96,18 +202,78 @@ class PDFViewer:
         self.sidebar = sidebar
 
     def display_pdf(self, pdf_file):
+        start = time.perf_counter()
+        self.inspect_view.close(redisplay=False)
         try:
             # Clear existing note input and set focus
             existing_note = self.file_handler.notes_dict.get(pdf_file, "")
             self.note_var.set(existing_note.upper())  # Use StringVar and ensure uppercase
+            if not existing_note:
+                self.apply_prefill(pdf_file)
+                self.text_index.prioritize([pdf_file])
             self.note_input.focus_set()
+            self.update_note_display()
+            self.update_note_warning(pdf_file)
+
+            # Every call supersedes the previous one; only the latest is painted
+            self.display_generation += 1
+            generation = self.display_generation
+            pdf_path = self.file_handler.get_pdf_path(pdf_file)
+            dispatcher = self.file_handler.dispatcher
 
-            # Render PDF
-            img = self.pdf_renderer.render_pdf(self.file_handler.get_pdf_path(pdf_file))
+            if dispatcher is None:
+                self._paint(self.render_ahead.get(pdf_path), start)
+                return
+
+            # A prerendered crop is painted straight away; anything else is
+            # rendered on a worker so key repeat never waits on fitz
+            crop = self.render_cache.get(pdf_path)
+            if crop is not None:
+                self._paint(crop, start)
+                return
+            # Never leave the previous document's crop up while the operator
+            # is already typing the note of this one
+            self.show_placeholder("Rendering…")
+            self.render_ahead.request(
+                pdf_path,
+                lambda crop: dispatcher.call_soon(
+                    self._on_rendered, generation, crop, start
+                ),
+            )
+
+        except Exception as e:
+            print(f"Error displaying PDF: {e}")
+            messagebox.showerror("Error", f"Failed to display PDF: {str(e)}")
+
+    def _on_rendered(self, generation, crop, start):
+        # Drop renders for documents the operator has already moved past
+        if generation == self.display_generation:
+            self._paint(crop, start)
+
+    def show_placeholder(self, text):
+        """Replace the displayed crop with a line of text"""
+        self.current_image = None
+        self.memory_budget.set_usage("photo", 0)
+        self.pdf_canvas.delete("all")
+        self.pdf_canvas.create_text(
+            int(self.pdf_canvas.cget("width")) // 2,
+            int(self.pdf_canvas.cget("height")) // 2,
+            text=text,
+            fill="#808080",
+            font=("Arial", 16),
+        )
+
+    def _paint(self, crop, start):
+        """Draw a rendered crop on the canvas and queue the neighbours"""
+        try:
+            img = self.pdf_renderer.to_photo(crop) if crop is not None else None
+            if img is None:
+                self.show_placeholder("Could not render this PDF")
 
             if img:
                 # Store the PhotoImage reference
                 self.current_image = img
+                self.memory_budget.set_usage("photo", image_bytes(img))
                 
                 # Get the image dimensions
                 width = img.width()
@@ -118,15 +284,179 @@ class PDFViewer:
                     self.pdf_canvas.configure(width=width, height=height)
                 
                 # Clear existing content and display new image
-                self.pdf_canvas.delete("all")
-                self.pdf_canvas.create_image(0, 0, anchor=tk.NW, image=self.current_image)
-                
-            self.update_note_display()
+                with self.render_stats.time("draw"):
+                    self.pdf_canvas.delete("all")
+                    self.pdf_canvas.create_image(0, 0, anchor=tk.NW, image=self.current_image)
+                self.render_stats.record("total", (time.perf_counter() - start) * 1000)
+
+            self.update_stats_overlay()
+            self.prefetch_neighbours()
 
         except Exception as e:
             print(f"Error displaying PDF: {e}")
             messagebox.showerror("Error", f"Failed to display PDF: {str(e)}")
 
+    def toggle_stats_overlay(self):
+        """Show or hide the render latency status line"""
+        self.stats_visible = not self.stats_visible
+        if self.stats_visible:
+            self.stats_label.pack(side=tk.BOTTOM, fill=tk.X)
+            self.update_stats_overlay()
+        else:
+            self.stats_label.pack_forget()
+        return "break"
+
+    def update_stats_overlay(self):
+        if self.stats_visible:
+            pool = self.document_pool.stats()
+            self.stats_label.config(
+                text=f"{self.render_stats.overlay_text()}    "
+                     f"open docs {pool['hits']}/{pool['hits'] + pool['misses']} hits, "
+                     f"{pool['bytes_read'] / 2**20:.0f} MB read ahead"
+            )
+
+    def export_stats(self):
+        """Save the render latency stats as JSON or CSV for comparing workstations"""
+        path = filedialog.asksaveasfilename(
+            title="Export render stats",
+            defaultextension=".json",
+            initialfile="render_stats.json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")],
+        )
+        if path:
+            try:
+                self.render_stats.export(
+                    path,
+                    self.file_handler.current_directory,
+                    counters={
+                        "document_pool": self.document_pool.stats(),
+                        "render_cache": self.render_cache.stats(),
+                    },
+                )
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to export stats: {str(e)}")
+        return "break"
+
+    def clear(self):
+        """Empty the workspace, e.g. for a directory without PDFs"""
+        self.inspect_view.close(redisplay=False)
+        self.display_generation += 1
+        self.current_image = None
+        self.memory_budget.set_usage("photo", 0)
+        self.pdf_canvas.delete("all")
+        self.note_var.set("")
+        self.note_display.config(text="")
+
+    def on_files_modified(self, pdf_files):
+        """Forget crops of PDFs rewritten on disk and redraw the current one if needed"""
+        for pdf_file in pdf_files:
+            pdf_path = self.file_handler.get_pdf_path(pdf_file)
+            self.render_cache.discard(pdf_path)
+            self.document_pool.invalidate(pdf_path)
+        self.text_index.discard(pdf_files)
+        if self.sidebar and self.sidebar.current_pdf_name in pdf_files:
+            self.display_pdf(self.sidebar.current_pdf_name)
+
+    def prefetch_neighbours(self):
+        """Queue background renders for the PDFs around the current selection"""
+        if not self.sidebar or self.sidebar.current_pdf_index < 0:
+            return
+        pdf_files = self.file_handler.pdf_files
+        indices = self.render_ahead.neighbours(
+            self.sidebar.current_pdf_index, len(pdf_files)
+        )
+        # Prefetch only what the memory budget can hold next to the current
+        # crop; more would just evict crops that were rendered moments ago
+        indices = indices[:max(0, self.render_cache.capacity() - 1)]
+        self.render_ahead.prefetch(
+            [self.file_handler.get_pdf_path(pdf_files[i]) for i in indices]
+        )
+        self.text_index.prioritize([pdf_files[i] for i in indices])
+        # A rewrite of a file whose crop is cached must not go unnoticed
+        self.file_handler.watch_files(
+            [pdf_files[i] for i in [self.sidebar.current_pdf_index] + indices]
+        )
+
+        if self.read_ahead:
+            start = self.sidebar.current_pdf_index + 1
+            upcoming = (
+                self.file_handler.get_pdf_path(pdf_file)
+                for pdf_file in pdf_files[start:start + self.read_ahead]
+            )
+            self.document_pool.read_ahead(
+                [path for path in upcoming if path not in self.render_cache]
+            )
+
+    def reset_render_ahead(self, directory=None):
+        """Forget prerendered crops and switch the disk cache to a new directory"""
+        self.render_ahead.cancel_pending()
+        self.render_cache.clear()
+        self.document_pool.clear()
+        self.render_ahead.disk_cache = (
+            DiskCropCache(directory, self.pdf_renderer) if directory else None
+        )
+        if directory:
+            if self.read_ahead_setting is None:
+                self.read_ahead = READ_AHEAD_FILES if is_network_path(directory) else 0
+            mode = directory_setting(directory, "color_mode", "rgb")
+            self.pdf_renderer.color_mode = mode if mode in COLOR_MODES else "rgb"
+            self.update_color_mode_label()
+
+    def load_citation_pattern(self, directory):
+        """Check notes against --citation-pattern, or else the directory's
+        "citation_pattern" setting; with neither, notes are not checked"""
+        pattern = self.citation_pattern
+        if pattern is None and directory:
+            pattern = directory_setting(directory, "citation_pattern")
+            try:
+                re.compile(pattern or "")
+            except (re.error, TypeError) as e:
+                print(f"Error in citation_pattern setting: {e}")
+                pattern = None
+        self.file_handler.note_index.set_pattern(pattern)
+
+    def cycle_color_mode(self):
+        """Switch to the next color mode and remember it for this directory"""
+        modes = COLOR_MODES
+        mode = modes[(modes.index(self.pdf_renderer.color_mode) + 1) % len(modes)]
+        self.pdf_renderer.color_mode = mode
+        # Crops of the old mode are useless now; the disk cache keys include
+        # the mode, so its entries simply stop matching
+        self.render_ahead.cancel_pending()
+        self.render_cache.clear()
+        if self.file_handler.current_directory:
+            set_directory_setting(self.file_handler.current_directory, "color_mode", mode)
+        self.update_color_mode_label()
+        self.redisplay_current()
+        return "break"
+
+    def update_color_mode_label(self):
+        names = {"rgb": "color", "gray": "grayscale", "bilevel": "black and white"}
+        self.color_mode_label.config(
+            text=f"Rendering: {names[self.pdf_renderer.color_mode]} (Ctrl+M to change)"
+        )
+
+    def toggle_inspect(self):
+        """Switch between the crop and a zoom/pan view of every page of the current PDF"""
+        if self.inspect_view.active:
+            return self.inspect_view.toggle(None)
+        if self.sidebar and self.sidebar.current_pdf_index >= 0:
+            pdf_file = self.file_handler.pdf_files[self.sidebar.current_pdf_index]
+            self.inspect_view.toggle(self.file_handler.get_pdf_path(pdf_file))
+        return "break"
+
+    def redisplay_current(self):
+        if self.sidebar and self.sidebar.current_pdf_index >= 0:
+            self.display_pdf(self.file_handler.pdf_files[self.sidebar.current_pdf_index])
+
+    def rerender_current(self):
+        """Drop the cached crop of the current PDF and render it again"""
+        if self.sidebar and self.sidebar.current_pdf_index >= 0:
+            pdf_file = self.file_handler.pdf_files[self.sidebar.current_pdf_index]
+            self.render_ahead.invalidate(self.file_handler.get_pdf_path(pdf_file))
+            self.display_pdf(pdf_file)
+        return "break"
+
     def handle_enter(self, event):
         self.save_note()
         if self.sidebar:
@@ -137,13 +467,24 @@ class PDFViewer:
         note = self.note_var.get().strip()  # Use StringVar instead of direct get()
         if note and self.sidebar.current_pdf_index >= 0:
             current_pdf = self.file_handler.pdf_files[self.sidebar.current_pdf_index]
-            self.file_handler.notes_dict[current_pdf] = note
-            self.file_handler.save_to_csv()
+            affected = self.file_handler.set_note(current_pdf, note)
             self.note_var.set("")  # Clear using StringVar
             self.update_note_display()
+            problem = self.file_handler.note_index.problem(current_pdf)
+            self.save_warning = f"{current_pdf}: {problem}" if problem else ""
+            self.update_note_warning(current_pdf)
             if self.sidebar:
-                self.sidebar.update_pdf_list()
-                self.sidebar.highlight_selected_item()
+                # Only the saved row and its collisions change; restyle those
+                self.sidebar.refresh_item(current_pdf)
+                for pdf_file in affected:
+                    self.sidebar.refresh_item(pdf_file)
+                self.sidebar.update_counter_label()
+
+    def update_note_warning(self, pdf_file):
+        """Warn about the shown PDF's note, or else about the last one saved"""
+        problem = self.file_handler.note_index.problem(pdf_file)
+        text = f"{pdf_file}: {problem}" if problem else self.save_warning
+        self.note_warning_label.config(text=text)
 
     def update_note_display(self):
         if hasattr(self.sidebar, 'current_pdf_index') and self.sidebar.current_pdf_index >= 0:
@@ -1,16 +1,54 @@
 # ui/sidebar.py
+import bisect
 import tkinter as tk
 from tkinter import ttk
 from models.pdf_item import PDFListItem
 import platform
 
+# Status filter choices -> ProgressModel set they show (None for all files);
+# "problems" shows duplicated and malformed notes from the NoteIndex
+STATUS_FILTERS = {
+    "All": None,
+    "Unfinished": "unfinished",
+    "Flagged": "flagged",
+    "Completed": "completed",
+    "Problems": "problems",
+}
+
+def with_folder_headers(names):
+    """Insert a "folder/" header row wherever the folder changes between files.
+
+    A folder's own files that sort after one of its subfolders get a second
+    header, so no file is shown under the wrong folder; top-level files get
+    a "/" header unless they come first. Returns the rows and, for each
+    header, the position in names of the file it precedes.
+    """
+    rows = []
+    positions = []
+    previous = ""
+    for i, name in enumerate(names):
+        folder = name.rpartition("/")[0]
+        if folder != previous or (i == 0 and folder):
+            previous = folder
+            positions.append(i)
+            rows.append(folder + "/")
+        rows.append(name)
+    return rows, positions
+
 class Sidebar:
     def __init__(self, parent, file_handler):
         self.parent = parent
         self.file_handler = file_handler
         self.pdf_viewer = None
         self.current_pdf_index = -1
+        self.current_pdf_name = None  # follows the selection when rows shift
         self.list_items = {}
+        # Sorted names the list shows while a search or status filter is
+        # active; None shows every file in pdf_files
+        self.view = None
+        self._filter_pending = False
+        self._grouped_rows = None  # rows with folder headers, in workspace mode
+        self._header_positions = []  # name positions the headers precede
         
         # Link sidebar to file handler
         self.file_handler.sidebar = self
@@ -33,17 +71,58 @@ class Sidebar:
             style="SidebarButton.TButton",
         ).pack(fill=tk.X, pady=(0, 5))
 
+        # Workspace mode: list every subfolder too, grouped by folder
+        self.recursive_var = tk.BooleanVar(value=self.file_handler.recursive)
+        self.recursive_check = ttk.Checkbutton(
+            sidebar_content,
+            text="Include subfolders",
+            variable=self.recursive_var,
+            command=self.on_recursive_toggle,
+            style="Sidebar.TCheckbutton",
+        )
+        self.recursive_check.pack(anchor="w")
+        if self.file_handler.storage_backend == "sqlite":
+            # The shared store covers one folder
+            self.recursive_check.state(["disabled"])
+
         # Counter label
         self.counter_label = ttk.Label(
             sidebar_content, text="No PDFs loaded", style="Counter.TLabel"
         )
         self.counter_label.pack(fill=tk.X, pady=5)
 
+        # Search box and status filter
+        self.setup_search(sidebar_content)
+
         # Scrollable list container
         self.setup_scrollable_list(sidebar_content)
 
+    def setup_search(self, parent):
+        """Set up the search box over file names and notes, and the status filter"""
+        search_frame = ttk.Frame(parent, style="Sidebar.TFrame")
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<Return>", lambda e: self.jump_to_result())
+        self.search_entry.bind("<Escape>", lambda e: self.clear_search())
+
+        self.filter_var = tk.StringVar(value="All")
+        ttk.Combobox(
+            search_frame,
+            textvariable=self.filter_var,
+            values=list(STATUS_FILTERS),
+            state="readonly",
+            width=10,
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.search_var.trace_add("write", lambda *args: self.schedule_filter())
+        self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+
     def setup_scrollable_list(self, parent):
-        """Set up the scrollable list container with platform-specific scroll handling"""
+        """Set up the virtualized list: a canvas sized for every row, on which a
+        small pool of row widgets is repositioned to cover only the visible rows"""
         # Container frame
         self.list_container = ttk.Frame(parent, style="Sidebar.TFrame")
         self.list_container.pack(fill=tk.BOTH, expand=True)
@@ -61,18 +140,16 @@ class Sidebar:
             command=self.canvas.yview
         )
 
-        # Scrollable frame for content
-        self.scrollable_frame = ttk.Frame(self.canvas, style="Sidebar.TFrame")
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-
-        # Create window in canvas
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", width=self.canvas.winfo_width())
+        # Row widgets recycled as the list scrolls, with their canvas windows
+        self.row_height = 0
+        self.row_pool = []
+        self.row_windows = []
+        self.header_pool = []
+        self.header_windows = []
+        self._refresh_pending = False
 
         # Configure canvas scroll
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
 
         # Pack everything
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -105,7 +182,169 @@ class Sidebar:
 
     def _on_canvas_configure(self, event):
         """Handle canvas resize events"""
-        self.canvas.itemconfig(self.canvas.find_withtag("all")[0], width=event.width)
+        for window in self.row_windows + self.header_windows:
+            self.canvas.itemconfig(window, width=event.width)
+        self._update_scrollregion()
+        self._schedule_refresh()
+
+    def _on_yscroll(self, first, last):
+        """Keep the scrollbar in sync and re-bind rows to the new viewport"""
+        self.scrollbar.set(first, last)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        # Coalesce bursts of scroll events into one refresh
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self._refresh_visible)
+
+    def _add_row(self, pdf_file, index):
+        """Create one more pooled row widget"""
+        item = PDFListItem(
+            self.canvas,
+            pdf_file,
+            index,
+            self.file_handler,
+            self.on_item_click,
+            self.on_flag_toggle
+        )
+        window = self.canvas.create_window(
+            0, index * self.row_height, window=item.frame, anchor="nw",
+            width=self.canvas.winfo_width()
+        )
+        self.row_pool.append(item)
+        self.row_windows.append(window)
+        return item
+
+    def _add_header(self):
+        """Create one more pooled folder header row"""
+        label = tk.Label(
+            self.canvas,
+            anchor="w",
+            background="#404040",
+            foreground="white",
+            font=("Arial", 10, "bold"),
+            padx=5,
+        )
+        window = self.canvas.create_window(
+            0, -2 * self.row_height, window=label, anchor="nw",
+            width=self.canvas.winfo_width(), height=self.row_height
+        )
+        self.header_pool.append(label)
+        self.header_windows.append(window)
+        return label
+
+    @property
+    def grouped(self):
+        return self.file_handler.recursive
+
+    @property
+    def rows(self):
+        """Names of the rows in the list, in order (with "folder/" headers in workspace mode)"""
+        names = self.file_handler.pdf_files if self.view is None else self.view
+        if not self.grouped:
+            return names
+        self._group_rows(names)
+        return self._grouped_rows
+
+    def _group_rows(self, names):
+        if self._grouped_rows is None:
+            self._grouped_rows, self._header_positions = with_folder_headers(names)
+
+    def row_of(self, index):
+        """Return the row showing pdf_files[index], or -1 if it is filtered out"""
+        if self.view is None and not self.grouped:
+            return index
+        pdf_files = self.file_handler.pdf_files
+        if not 0 <= index < len(pdf_files):
+            return -1
+        names = pdf_files if self.view is None else self.view
+        i = bisect.bisect_left(names, pdf_files[index])
+        if i == len(names) or names[i] != pdf_files[index]:
+            return -1
+        if not self.grouped:
+            return i
+        self._group_rows(names)
+        return i + bisect.bisect_right(self._header_positions, i)
+
+    def folder_caption(self, header):
+        if header == "/":
+            return "Top folder"
+        completed, total = self.file_handler.progress.folder_counts(header[:-1])
+        return f"{header[:-1]}   {completed} of {total}"
+
+    def _ensure_row_height(self):
+        """Measure the height of a row from the first pooled widget"""
+        if self.row_height or not self.file_handler.pdf_files:
+            return
+        item = self._add_row(self.file_handler.pdf_files[0], 0)
+        item.frame.update_idletasks()
+        self.row_height = max(1, item.frame.winfo_reqheight())
+        # Scroll by whole rows so the pool lines up with the viewport
+        self.canvas.configure(yscrollincrement=self.row_height)
+
+    def _update_scrollregion(self):
+        height = len(self.rows) * self.row_height
+        self.canvas.configure(
+            scrollregion=(0, 0, self.canvas.winfo_width(), height)
+        )
+
+    def _refresh_visible(self):
+        """Bind pooled row widgets to the rows currently in the viewport"""
+        self._refresh_pending = False
+        rows = self.rows
+        if not self.row_height:
+            return
+
+        first = max(0, int(self.canvas.canvasy(0)) // self.row_height)
+        visible = self.canvas.winfo_height() // self.row_height + 2
+        count = max(0, min(len(rows) - first, visible))
+
+        index_of = self.file_handler.progress.index_of
+        direct = self.view is None and not self.grouped
+        self.list_items = {}
+        items = headers = 0
+        for row in range(first, first + count):
+            name = rows[row]
+            if name.endswith("/"):
+                if headers == len(self.header_pool):
+                    self._add_header()
+                self.header_pool[headers].config(text=self.folder_caption(name))
+                self.canvas.coords(self.header_windows[headers], 0, row * self.row_height)
+                headers += 1
+                continue
+            if items == len(self.row_pool):
+                self._add_row(name, row)
+            item = self.row_pool[items]
+            # Rows keep their pdf_files index, which is what selection uses
+            item.bind_to(name, row if direct else index_of(name))
+            self.canvas.coords(self.row_windows[items], 0, row * self.row_height)
+            self.list_items[name] = item
+            items += 1
+
+        # Park unused rows above the scroll region, out of view
+        for window in self.row_windows[items:] + self.header_windows[headers:]:
+            self.canvas.coords(window, 0, -2 * self.row_height)
+
+    def see(self, index):
+        """Scroll the list just enough to make the row of pdf_files[index] visible"""
+        total_height = len(self.rows) * self.row_height
+        row = self.row_of(index)
+        if not total_height or row < 0:
+            return
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        y = row * self.row_height
+        if y < top:
+            self.canvas.yview_moveto(y / total_height)
+        elif y + self.row_height > top + height:
+            self.canvas.yview_moveto((y + self.row_height - height) / total_height)
+
+    def on_recursive_toggle(self):
+        """Reopen the current directory with or without its subfolders"""
+        self.file_handler.recursive = self.recursive_var.get()
+        if self.file_handler.current_directory:
+            self.file_handler.load_directory(self.file_handler.current_directory)
 
     def set_pdf_viewer(self, pdf_viewer):
         """Set the associated PDF viewer instance"""
@@ -113,8 +352,13 @@ class Sidebar:
 
     def on_item_click(self, index):
         """Handle click events on PDF items"""
+        previous_index = self.current_pdf_index
         self.current_pdf_index = index
-        self.highlight_selected_item()
+        self.current_pdf_name = self.file_handler.pdf_files[index]
+        self.see(index)
+        # Only the old and new selection change appearance
+        self.restyle_index(previous_index)
+        self.restyle_index(index)
         if self.pdf_viewer:
             self.pdf_viewer.display_pdf(self.file_handler.pdf_files[index])
 
@@ -123,69 +367,229 @@ class Sidebar:
         for item in self.list_items.values():
             item.update_appearance()
 
+    def restyle_index(self, index):
+        """Update the appearance of the row at index, if it is on screen"""
+        pdf_files = self.file_handler.pdf_files
+        if 0 <= index < len(pdf_files):
+            item = self.list_items.get(pdf_files[index])
+            if item is not None:
+                item.update_appearance()
+
     def update_pdf_list(self):
         """Refresh the list of PDF items"""
-        # Clear existing items
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.list_items.clear()
-
-        # Create new items
-        for i, pdf in enumerate(self.file_handler.pdf_files):
-            self.list_items[pdf] = PDFListItem(
-                self.scrollable_frame,
-                pdf,
-                i,
-                self.file_handler,
-                self.on_item_click,
-                self.on_flag_toggle
+        self._update_view()
+        self._ensure_row_height()
+        self._update_scrollregion()
+        self._refresh_visible()
+
+        # Update the counter
+        self.update_counter_label()
+
+    def on_files_changed(self):
+        """Re-sync rows and selection after PDFs were added to or removed from the listing"""
+        pdf_files = self.file_handler.pdf_files
+        vanished = False
+        if self.current_pdf_name is not None:
+            self.current_pdf_index = self.file_handler.progress.index_of(
+                self.current_pdf_name
             )
-        
-        # Update the counter and scroll region
+            vanished = self.current_pdf_index < 0
+        self._update_view()
+        self._ensure_row_height()
+        self._update_scrollregion()
+        self._refresh_visible()
         self.update_counter_label()
-        self.scrollable_frame.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+        if vanished and pdf_files:
+            # The open PDF was deleted; move to the one now in its place
+            index = bisect.bisect_left(pdf_files, self.current_pdf_name)
+            self.on_item_click(min(index, len(pdf_files) - 1))
 
     def update_counter_label(self):
         """Update the counter showing progress through PDF files"""
+        scanning = self.file_handler.scanning
         if not self.file_handler.pdf_files:
-            self.counter_label.config(text="No PDFs loaded")
+            text = "Scanning…" if scanning else "No PDFs loaded"
+            self.counter_label.config(text=text)
         else:
-            completed_count = sum(
-                1 for pdf in self.file_handler.pdf_files
-                if pdf in self.file_handler.notes_dict and self.file_handler.notes_dict[pdf]
-            )
-            total = len(self.file_handler.pdf_files)
-            self.counter_label.config(text=f"PDF {completed_count} of {total}")
+            progress = self.file_handler.progress
+            text = f"PDF {len(progress.completed)} of {progress.total}"
+            if self.view is not None:
+                text += f" ({len(self.view)} shown)"
+            if scanning:
+                text += " (scanning…)"
+            self.counter_label.config(text=text)
 
     def next_pdf(self):
         """Move to the next PDF in the list"""
+        if self.view is not None:
+            return self._step_view(True)
         if self.current_pdf_index < len(self.file_handler.pdf_files) - 1:
             self.on_item_click(self.current_pdf_index + 1)
         return "break"
 
     def previous_pdf(self):
         """Move to the previous PDF in the list"""
+        if self.view is not None:
+            return self._step_view(False)
         if self.current_pdf_index > 0:
             self.on_item_click(self.current_pdf_index - 1)
         return "break"
 
+    def _step_view(self, forward):
+        # Step through the filtered rows; the current PDF may have dropped
+        # out of them (e.g. saved while showing unfinished files)
+        view = self.view
+        if self.current_pdf_name is None:
+            i = 0 if forward else len(view) - 1
+        elif forward:
+            i = bisect.bisect_right(view, self.current_pdf_name)
+        else:
+            i = bisect.bisect_left(view, self.current_pdf_name) - 1
+        if 0 <= i < len(view):
+            self.select_pdf(view[i])
+        return "break"
+
+    def _update_view(self):
+        """Recompute the filtered rows from the search box and status filter"""
+        self._grouped_rows = None
+        query = self.search_var.get().strip()
+        status = STATUS_FILTERS.get(self.filter_var.get())
+        if not query and status is None:
+            self.view = None
+            return
+        progress = self.file_handler.progress
+        if status == "problems":
+            note_index = self.file_handler.note_index
+            members = {
+                f for f in note_index.duplicates | note_index.malformed
+                if progress.is_listed(f)
+            }
+        else:
+            members = getattr(progress, status) if status else None
+        if not query:
+            self.view = sorted(members)
+            return
+        found = self.file_handler.search_index.search(query)
+        self.view = found if members is None else [f for f in found if f in members]
+
+    def schedule_filter(self):
+        """Re-filter the list once the current burst of keystrokes or saves is handled"""
+        if not self._filter_pending:
+            self._filter_pending = True
+            self.canvas.after_idle(self.apply_filter)
+
+    def apply_filter(self):
+        """Show only the rows matching the search box and status filter"""
+        self._filter_pending = False
+        filtered = self.view is not None
+        self._update_view()
+        if not filtered and self.view is None:
+            return
+        self._update_scrollregion()
+        if self.row_of(self.current_pdf_index) >= 0:
+            self.see(self.current_pdf_index)
+        else:
+            self.canvas.yview_moveto(0)
+        self._refresh_visible()
+        self.update_counter_label()
+
+    def jump_to_result(self):
+        """Open the next search result after the current PDF, wrapping around"""
+        if self._filter_pending:
+            self.apply_filter()
+        if not self.view:
+            return "break"
+        i = 0
+        if self.current_pdf_name is not None:
+            i = bisect.bisect_right(self.view, self.current_pdf_name) % len(self.view)
+        self.select_pdf(self.view[i])
+        return "break"
+
+    def focus_search(self):
+        """Put the cursor in the search box"""
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+        return "break"
+
+    def clear_search(self):
+        """Empty the search box and return to the note field"""
+        self.search_var.set("")
+        if self.pdf_viewer:
+            self.pdf_viewer.note_input.focus_set()
+        return "break"
+
+    def _jump(self, index):
+        if index >= 0 and index != self.current_pdf_index:
+            self.on_item_click(index)
+        return "break"
+
+    def next_unfinished(self):
+        """Jump to the next PDF without a note, wrapping around"""
+        return self._jump(
+            self.file_handler.progress.next_unfinished(self.current_pdf_index)
+        )
+
+    def previous_unfinished(self):
+        """Jump to the previous PDF without a note, wrapping around"""
+        return self._jump(
+            self.file_handler.progress.previous_unfinished(self.current_pdf_index)
+        )
+
+    def next_flagged(self):
+        """Jump to the next flagged PDF, wrapping around"""
+        return self._jump(
+            self.file_handler.progress.next_flagged(self.current_pdf_index)
+        )
+
     def toggle_flag(self):
         """Toggle the flag status of the current PDF"""
         if self.current_pdf_index >= 0:
             pdf_file = self.file_handler.pdf_files[self.current_pdf_index]
             current_flag = self.file_handler.flags_dict.get(pdf_file, False)
-            self.file_handler.flags_dict[pdf_file] = not current_flag
-            self.file_handler.save_to_csv()
+            self.file_handler.set_flag(pdf_file, not current_flag)
             
             if pdf_file in self.list_items:
                 item = self.list_items[pdf_file]
                 item.var.set(not current_flag)
                 item.update_appearance()
+            if self.view is not None:
+                self.schedule_filter()
         return "break"
 
+    def refresh_item(self, pdf_file):
+        """Re-read the flag/note state of one row, e.g. after another operator changed it"""
+        if pdf_file in self.list_items:
+            item = self.list_items[pdf_file]
+            item.var.set(self.file_handler.flags_dict.get(pdf_file, False))
+            item.update_appearance()
+        if self.view is not None:
+            self.schedule_filter()
+        elif self.grouped:
+            # Folder headers show the folder's progress
+            self._schedule_refresh()
+
+    def select_pdf(self, pdf_file):
+        """Select the row of pdf_file, if it is listed"""
+        index = self.file_handler.progress.index_of(pdf_file)
+        if index >= 0:
+            self.on_item_click(index)
+
+    def claim_next(self):
+        """Claim and open the next unfinished PDF nobody else is working on"""
+        current = ""
+        if self.current_pdf_index >= 0:
+            current = self.file_handler.pdf_files[self.current_pdf_index]
+        self.file_handler.claim_next(self._on_claimed, after=current)
+        return "break"
+
+    def _on_claimed(self, pdf_file):
+        if pdf_file:
+            self.select_pdf(pdf_file)
+
     def on_flag_toggle(self, pdf_file):
         """Handle flag toggle events from PDF items"""
-        self.file_handler.save_to_csv()
         if pdf_file in self.list_items:
-            self.list_items[pdf_file].update_appearance()
\ No newline at end of file
+            self.list_items[pdf_file].update_appearance()
+        if self.view is not None:
+            self.schedule_filter()
\ No newline at end of file
@@ -0,0 +1,181 @@
+# utils/crop_cache.py
+import hashlib
+import io
+import os
+import shutil
+import threading
+
+from utils.pdf_renderer import PPMCrop
+
+CACHE_DIR_NAME = ".pdf_viewer_cache"
+# Large enough for a full overnight pre-render of a typical batch
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+
+class DiskCropCache:
+    """Persistent cache of rendered crops in a sidecar folder of a PDF directory.
+
+    The folder sits next to pdf_notes.csv, so every operator opening the
+    batch (and the prerender CLI) shares it. Entries are PNG files named by
+    a hash of the PDF's relative path, size, mtime and the renderer's
+    parameters, so a changed file or setting simply misses.
+    """
+
+    def __init__(self, directory, renderer, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.renderer = renderer
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.join(directory, CACHE_DIR_NAME)
+        self.hits = 0
+        self.misses = 0
+        # Running estimate of the cache size, seeded by one directory scan, so
+        # the folder is only re-scanned when it actually needs trimming
+        self._approx_bytes = None
+        self._lock = threading.Lock()
+
+    def key_for(self, pdf_path):
+        """Return the cache key for pdf_path, or None if the file is unreadable"""
+        try:
+            st = os.stat(pdf_path)
+        except OSError:
+            return None
+        identity = "|".join(
+            (
+                os.path.relpath(pdf_path, self.directory).replace(os.sep, "/"),
+                str(st.st_size),
+                str(st.st_mtime_ns),
+                self.renderer.cache_signature(),
+            )
+        )
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, pdf_path):
+        """Return the cached crop as a PIL image, or None"""
+        key = self.key_for(pdf_path)
+        img = None
+        if key:
+            entry = self._entry_path(key)
+            try:
+                with open(entry, "rb") as f:
+                    data = f.read()
+                from PIL import Image
+
+                img = Image.open(io.BytesIO(data))
+                img.load()
+            except (OSError, ValueError):
+                img = None
+        if img is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Mark as recently used for eviction; best effort on read-only shares
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def contains(self, pdf_path):
+        key = self.key_for(pdf_path)
+        return bool(key) and os.path.exists(self._entry_path(key))
+
+    def put(self, pdf_path, img):
+        """Store a rendered crop, written atomically so readers never see a partial file"""
+        key = self.key_for(pdf_path)
+        if not key or img is None:
+            return
+        self.put_encoded(key, encode_png(img))
+
+    def put_encoded(self, key, data):
+        """Store already PNG-encoded crop bytes under key"""
+        entry = self._entry_path(key)
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, entry)
+        except OSError as e:
+            print(f"Error writing crop cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        # Several render workers write at once; update the estimate atomically
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self.size_bytes()
+            else:
+                self._approx_bytes += len(data)
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def invalidate(self, pdf_path=None):
+        """Drop the cached crop for pdf_path, or the whole cache if no path is given"""
+        if pdf_path is None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            with self._lock:
+                self._approx_bytes = None
+            return
+        key = self.key_for(pdf_path)
+        if key:
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".png"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in 90% of max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        with self._lock:
+            self._approx_bytes = total
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            if total <= self.max_bytes * 0.9:
+                break
+        with self._lock:
+            self._approx_bytes = total
+        return removed
+
+
+def encode_png(img):
+    """Encode a crop as PNG, favouring speed over size"""
+    if isinstance(img, PPMCrop):
+        img = img.to_pil()
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
@@ -0,0 +1,155 @@
+# utils/directory_scanner.py
+import os
+import threading
+import time
+from collections import deque
+
+
+def scan_pdf_names(directory, is_valid_pdf):
+    """Yield the names of valid PDFs in directory, in directory order"""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if is_valid_pdf(entry.name):
+                yield entry.name
+
+
+def walk_workspace(directory, is_valid_pdf, load_notes):
+    """Yield (folder, pdf names, *load_notes(folder path)) for directory and
+    every folder below it, breadth first.
+
+    folder is relative to directory with "/" separators ("" for directory
+    itself). Hidden folders (including the crop cache) are skipped, and so
+    are folders that can't be read, except directory itself.
+    """
+    pending = deque([""])
+    while pending:
+        folder = pending.popleft()
+        path = os.path.join(directory, *folder.split("/")) if folder else directory
+        names = []
+        subfolders = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(f"{folder}/{entry.name}" if folder else entry.name)
+                    elif is_valid_pdf(entry.name):
+                        names.append(entry.name)
+            notes = load_notes(path)
+        except OSError as e:
+            if not folder:
+                raise
+            print(f"Error scanning folder {folder}: {e}")
+            continue
+        pending.extend(sorted(subfolders))
+        yield (folder, names) + tuple(notes)
+
+
+class DirectoryScanner:
+    """Lists a directory on a background thread and streams PDF names in batches.
+
+    Batches are posted through a MainThreadDispatcher so on_batch/on_done run
+    on the Tk thread. A cancelled scan stops at the next entry and posts
+    nothing further.
+    """
+
+    def __init__(self, directory, is_valid_pdf, dispatcher, on_batch, on_done,
+                 batch_size=500):
+        self.directory = directory
+        self.is_valid_pdf = is_valid_pdf
+        self.dispatcher = dispatcher
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.batch_size = batch_size
+        self.found = 0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="directory-scan", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        batch = []
+        error = None
+        try:
+            for name in scan_pdf_names(self.directory, self.is_valid_pdf):
+                if self.cancelled:
+                    return
+                batch.append(name)
+                # Send the first documents quickly, then in full batches
+                if len(batch) >= (self.batch_size if self.found else 50):
+                    self.found += len(batch)
+                    self.dispatcher.call_soon(self._deliver, batch)
+                    batch = []
+        except OSError as e:
+            error = e
+        if self.cancelled:
+            return
+        if batch:
+            self.found += len(batch)
+            self.dispatcher.call_soon(self._deliver, batch)
+        self.dispatcher.call_soon(self._finish, error)
+
+    def _deliver(self, batch):
+        if not self.cancelled:
+            self.on_batch(batch)
+
+    def _finish(self, error):
+        if not self.cancelled:
+            self.on_done(error)
+
+
+class WorkspaceScanner(DirectoryScanner):
+    """Walks a folder tree on a background thread, streaming each folder's
+    listing and notes (see walk_workspace) to on_batch in lists.
+
+    The first folder with PDFs is sent on its own so the sidebar fills at
+    once; after that folders are grouped into batches of about batch_size
+    PDFs, or whatever was found within max_delay seconds.
+    """
+
+    def __init__(self, directory, is_valid_pdf, dispatcher, on_batch, on_done,
+                 load_notes, batch_size=500, max_delay=0.25):
+        super().__init__(directory, is_valid_pdf, dispatcher, on_batch, on_done, batch_size)
+        self.load_notes = load_notes
+        self.max_delay = max_delay
+        self._thread.name = "workspace-scan"
+
+    def _run(self):
+        batch = []
+        pending = 0
+        error = None
+        last_sent = time.monotonic()
+        try:
+            for folder in walk_workspace(self.directory, self.is_valid_pdf, self.load_notes):
+                if self.cancelled:
+                    return
+                batch.append(folder)
+                pending += len(folder[1])
+                if (
+                    pending >= (self.batch_size if self.found else 1)
+                    or time.monotonic() - last_sent >= self.max_delay
+                ):
+                    self.found += pending
+                    self.dispatcher.call_soon(self._deliver, batch)
+                    batch = []
+                    pending = 0
+                    last_sent = time.monotonic()
+        except OSError as e:
+            error = e
+        if self.cancelled:
+            return
+        if batch:
+            self.found += pending
+            self.dispatcher.call_soon(self._deliver, batch)
+        self.dispatcher.call_soon(self._finish, error)
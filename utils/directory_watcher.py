@@ -0,0 +1,243 @@
+# utils/directory_watcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from utils.filesystem import NETWORK_FILESYSTEMS, filesystem_type
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """Return libc if inotify can be used from this process, else None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class DirectoryWatcher:
+    """Reports PDFs added to, removed from or rewritten in a directory.
+
+    Uses inotify on local Linux filesystems and otherwise falls back to a
+    poller. The poller only re-lists the directory when its mtime changes
+    (or while a new file is still growing), and diffs name -> (size, mtime)
+    snapshots. New files are reported once they are fully written.
+    Rewriting a file in place leaves the directory's mtime alone, so the
+    files passed to watch() (the ones the viewer has rendered) are also
+    stat'ed on every poll; other in-place rewrites are only noticed at the
+    next re-list.
+    on_change(added, removed, modified) runs on the Tk thread through the
+    dispatcher.
+    """
+
+    def __init__(self, directory, is_valid_pdf, dispatcher, on_change,
+                 known_files=(), poll_interval=2.0):
+        self.directory = directory
+        self.is_valid_pdf = is_valid_pdf
+        self.dispatcher = dispatcher
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.known = set(known_files)
+        self._watched = ()  # names stat'ed on every poll
+        self._stop = threading.Event()
+        self._libc = None
+        # inotify only sees changes made through the local kernel, so files
+        # dropped onto a share by a scanner would never show up; poll instead
+        if filesystem_type(directory) not in NETWORK_FILESYSTEMS:
+            self._libc = _load_inotify()
+        self.mode = "inotify" if self._libc else "poll"
+        self._thread = threading.Thread(
+            target=self._run, name="directory-watch", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def watch(self, names):
+        """Check these files for in-place rewrites on every poll"""
+        self._watched = tuple(names)
+
+    def _post(self, added, removed, modified):
+        added = sorted(added)
+        removed = sorted(removed)
+        modified = sorted(modified)
+        if (added or removed or modified) and not self._stop.is_set():
+            self.dispatcher.call_soon(self._deliver, added, removed, modified)
+
+    def _deliver(self, added, removed, modified):
+        if not self._stop.is_set():
+            self.on_change(added, removed, modified)
+
+    def _run(self):
+        if self._libc:
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                print(f"inotify unavailable, polling directory instead: {e}")
+                self.mode = "poll"
+        self._run_poll()
+
+    # Polling
+
+    def _snapshot(self):
+        snapshot = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if self.is_valid_pdf(entry.name):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[entry.name] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _check_watched(self, previous):
+        """Return the watched files whose size or mtime changed, updating previous"""
+        modified = set()
+        for name in self._watched:
+            if name not in previous:
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # removed; the next re-list reports it
+            stat = (st.st_size, st.st_mtime_ns)
+            if previous[name] != stat:
+                previous[name] = stat
+                modified.add(name)
+        return modified
+
+    def _run_poll(self):
+        previous = {}
+        growing = set()  # new files whose size was still changing
+        dir_mtime = None
+        first = True
+        while not self._stop.wait(0 if first else self.poll_interval):
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+                if mtime == dir_mtime and not growing and not first:
+                    self._post((), (), self._check_watched(previous))
+                    continue
+                dir_mtime = mtime
+                snapshot = self._snapshot()
+            except OSError as e:
+                print(f"Error polling directory: {e}")
+                continue
+
+            added = set()
+            modified = set()
+            for name, stat in snapshot.items():
+                if name in self.known:
+                    if not first and name in previous and previous[name] != stat:
+                        modified.add(name)
+                elif name in previous and previous[name] == stat:
+                    # Unchanged since the last poll: the scanner is done with it
+                    added.add(name)
+                    growing.discard(name)
+                else:
+                    growing.add(name)
+            removed = self.known - set(snapshot)
+            growing &= set(snapshot)
+
+            self.known |= added
+            self.known -= removed
+            previous = snapshot
+            first = False
+            self._post(added, removed, modified)
+
+    # inotify
+
+    def _run_inotify(self):
+        libc = self._libc
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            wd = libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+            # Catch files that arrived between the scan and the watch
+            self._reconcile()
+
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                # Let a burst of scanner output collect into one update
+                self._stop.wait(0.25)
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                if self._handle_events(data):
+                    self._reconcile()
+        finally:
+            os.close(fd)
+
+    def _handle_events(self, data):
+        """Apply a buffer of inotify events; return True if a full re-list is needed"""
+        added, removed, modified = set(), set(), set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return True
+            if mask & IN_DELETE_SELF:
+                self._stop.set()
+                continue
+            if mask & IN_ISDIR or not self.is_valid_pdf(name):
+                continue
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                if name in self.known:
+                    removed.add(name)
+                added.discard(name)
+                modified.discard(name)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                removed.discard(name)
+                if name in self.known:
+                    modified.add(name)
+                else:
+                    added.add(name)
+
+        self.known |= added
+        self.known -= removed
+        self._post(added, removed, modified)
+        return False
+
+    def _reconcile(self):
+        try:
+            names = set(self._snapshot())
+        except OSError as e:
+            print(f"Error listing directory: {e}")
+            return
+        added = names - self.known
+        removed = self.known - names
+        self.known = names
+        self._post(added, removed, ())
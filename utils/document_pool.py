@@ -0,0 +1,253 @@
+# utils/document_pool.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from utils.pdf_renderer import FITZ_LOCK
+
+
+class DocumentPool:
+    """Bounded LRU pool of open fitz.Documents, with optional read-ahead.
+
+    Going back and forth between documents reuses the open handle instead of
+    re-opening the file and re-parsing its xref, which on an SMB share costs
+    several round trips each time. read_ahead() bulk-reads upcoming files
+    into memory on a background thread; those are then opened with
+    fitz.open(stream=...), so rendering never waits on the share.
+
+    Documents are always opened from an in-memory copy of the file, so the
+    pool never holds a file open. On Windows an open handle would stop the
+    scanners from replacing or removing the file.
+
+    Reading a file can take a while on a share, so it happens in fetch(),
+    without FITZ_LOCK; only document(), which must be called with FITZ_LOCK
+    held like any other fitz call, opens it:
+
+        data = pool.fetch(pdf_path)
+        with FITZ_LOCK:
+            doc = pool.document(pdf_path, data)
+
+    With a MemoryBudget the bytes of buffers and open documents count
+    against it, and buffers read ahead are dropped when it runs over.
+    """
+
+    def __init__(self, max_documents=8, max_buffer_bytes=64 * 1024 * 1024, budget=None):
+        self.max_documents = max_documents
+        self.max_buffer_bytes = max_buffer_bytes
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.buffer_hits = 0
+        self.bytes_read = 0
+        self._documents = OrderedDict()  # pdf path -> open fitz.Document
+        self._document_bytes = {}  # pdf path -> size of the stream behind it
+        self._buffers = OrderedDict()  # pdf path -> file bytes read ahead
+        self._buffer_bytes = 0
+        self._pending = {}  # pdf path -> Future of a read still queued
+        self._lock = threading.Lock()
+        self._executor = None
+        if budget:
+            budget.register(self)
+
+    def _charge(self, nbytes):
+        if self.budget and nbytes:
+            self.budget.charge(nbytes)
+
+    def _take_buffer(self, pdf_path):
+        """Remove and return the buffered bytes of pdf_path, or None (call with _lock held)"""
+        data = self._buffers.pop(pdf_path, None)
+        if data is not None:
+            self._buffer_bytes -= len(data)
+        return data
+
+    def _read_file(self, pdf_path):
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.bytes_read += len(data)
+        return data
+
+    def fetch(self, pdf_path):
+        """Get the bytes of pdf_path ready for document(); call without FITZ_LOCK.
+
+        Returns None when the document is already open, otherwise the file's
+        bytes, from the read-ahead buffer if they are there. A read-ahead of
+        the file still in flight is waited for rather than repeated.
+        """
+        with self._lock:
+            if pdf_path in self._documents:
+                return None
+            future = self._pending.get(pdf_path)
+        if future is not None:
+            try:
+                future.result()
+            except CancelledError:
+                pass
+        with self._lock:
+            if pdf_path in self._documents:
+                return None
+            data = self._take_buffer(pdf_path)
+            if data is not None:
+                self.buffer_hits += 1
+        if data is not None:
+            self._charge(-len(data))
+        return data if data is not None else self._read_file(pdf_path)
+
+    def peek(self, pdf_path):
+        """Return the read-ahead bytes of pdf_path without taking them, or None"""
+        with self._lock:
+            return self._buffers.get(pdf_path)
+
+    def opened(self, pdf_path):
+        """Return pdf_path's document if it is open, or None, without counting a
+        lookup; only use the document with FITZ_LOCK held, and don't close it"""
+        with self._lock:
+            return self._documents.get(pdf_path)
+
+    def document(self, pdf_path, data=None):
+        """Return an open document for pdf_path; the pool owns it, don't close it.
+
+        data is what fetch() returned. Without it the file is read here,
+        under FITZ_LOCK, so callers should fetch() first.
+        """
+        import fitz
+
+        with self._lock:
+            doc = self._documents.get(pdf_path)
+            if doc is not None:
+                self._documents.move_to_end(pdf_path)
+                self.hits += 1
+                return doc
+            self.misses += 1
+            buffered = None
+            if data is None:
+                buffered = data = self._take_buffer(pdf_path)
+                if data is not None:
+                    self.buffer_hits += 1
+
+        if buffered is not None:
+            self._charge(-len(buffered))
+        if data is None:
+            data = self._read_file(pdf_path)
+        doc = fitz.open(stream=data, filetype="pdf")
+
+        with self._lock:
+            self._documents[pdf_path] = doc
+            self._document_bytes[pdf_path] = len(data)
+            freed = -len(data)
+            evicted = []
+            while len(self._documents) > self.max_documents:
+                path, old = self._documents.popitem(last=False)
+                freed += self._document_bytes.pop(path, 0)
+                evicted.append(old)
+        for old in evicted:
+            old.close()
+        self._charge(-freed)
+        if self.budget:
+            self.budget.reclaim()
+        return doc
+
+    def evict_oldest(self):
+        """Drop the oldest read-ahead buffer for the MemoryBudget; False if none left.
+
+        Open documents stay: closing one needs FITZ_LOCK, which the thread
+        reclaiming memory may not be able to take.
+        """
+        with self._lock:
+            if not self._buffers:
+                return False
+            data = self._buffers.popitem(last=False)[1]
+            self._buffer_bytes -= len(data)
+        self._charge(-len(data))
+        return True
+
+    def read_ahead(self, pdf_paths):
+        """Read the files of pdf_paths into memory in the background, in order.
+
+        Queued reads for files no longer listed are dropped; files already
+        open or buffered are skipped.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="read-ahead")
+        wanted = set(pdf_paths)
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in wanted and future.cancel():
+                    del self._pending[path]
+            for path in pdf_paths:
+                if path in self._pending or path in self._documents or path in self._buffers:
+                    continue
+                self._pending[path] = self._executor.submit(self._read, path)
+
+    def _read(self, pdf_path):
+        try:
+            with open(pdf_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error reading ahead {pdf_path}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._pending.pop(pdf_path, None)
+        with self._lock:
+            self.bytes_read += len(data)
+            if pdf_path in self._documents or len(data) > self.max_buffer_bytes:
+                return
+            added = len(data) - len(self._take_buffer(pdf_path) or b"")
+            self._buffers[pdf_path] = data
+            self._buffer_bytes += len(data)
+            while self._buffer_bytes > self.max_buffer_bytes:
+                dropped = len(self._buffers.popitem(last=False)[1])
+                self._buffer_bytes -= dropped
+                added -= dropped
+        self._charge(added)
+        if self.budget:
+            self.budget.reclaim()
+
+    def invalidate(self, pdf_path):
+        """Forget the handle and buffer of a file that changed on disk"""
+        with FITZ_LOCK:
+            with self._lock:
+                doc = self._documents.pop(pdf_path, None)
+                freed = self._document_bytes.pop(pdf_path, 0)
+                freed += len(self._take_buffer(pdf_path) or b"")
+            if doc is not None:
+                doc.close()
+        self._charge(-freed)
+
+    def clear(self):
+        """Close every pooled document and drop all buffers, e.g. on a directory switch"""
+        with FITZ_LOCK:
+            with self._lock:
+                for future in self._pending.values():
+                    future.cancel()
+                self._pending.clear()
+                documents = list(self._documents.values())
+                freed = self._buffer_bytes + sum(self._document_bytes.values())
+                self._documents.clear()
+                self._document_bytes.clear()
+                self._buffers.clear()
+                self._buffer_bytes = 0
+            for doc in documents:
+                doc.close()
+        self._charge(-freed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.clear()
+
+    def stats(self):
+        """Return a snapshot of the pool counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "open_documents": len(self._documents),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "buffer_hits": self.buffer_hits,
+                "buffered_bytes": self._buffer_bytes,
+                "document_bytes": sum(self._document_bytes.values()),
+                "bytes_read": self.bytes_read,
+            }
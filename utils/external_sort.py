@@ -0,0 +1,54 @@
+# utils/external_sort.py
+import csv
+import heapq
+import os
+import tempfile
+from contextlib import contextmanager
+from operator import itemgetter
+
+# Rows held in memory before a sorted run is spilled to disk
+DEFAULT_CHUNK_ROWS = 200000
+
+
+def _spill(rows, directory, key):
+    """Sort rows and write them to a temporary CSV file; return its path"""
+    rows.sort(key=key)
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def _read_run(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.reader(f)
+
+
+@contextmanager
+def sorted_rows(rows, key=itemgetter(0), chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Sort an iterable of string rows in bounded memory; yields an iterator.
+
+    Rows are sorted chunk_rows at a time and spilled to temporary CSV files,
+    which are then merged lazily. Rows with equal keys keep their input
+    order, so later rows can override earlier ones. The temporary files are
+    removed when the context exits.
+    """
+    with tempfile.TemporaryDirectory(prefix="pdf_viewer_sort_") as directory:
+        runs = []
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                runs.append(_spill(chunk, directory, key))
+                chunk = []
+        if not runs:
+            # Everything fit in one chunk; no need to touch the disk
+            chunk.sort(key=key)
+            yield iter(chunk)
+            return
+        if chunk:
+            runs.append(_spill(chunk, directory, key))
+        chunk = None
+        # heapq.merge takes equal keys from earlier runs first, which keeps
+        # the sort stable across runs
+        yield heapq.merge(*(_read_run(path) for path in runs), key=key)
@@ -1,7 +1,26 @@
 # utils/file_handler.py
 import os
-import csv
+import bisect
+import itertools
+import getpass
+import socket
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog
+from models.note_index import NoteIndex
+from models.progress_model import ProgressModel
+from models.search_index import SearchIndex
+from utils.directory_scanner import DirectoryScanner, WorkspaceScanner, walk_workspace
+from utils.directory_watcher import DirectoryWatcher
+from utils.notes_shards import NotesShards, join_folder, read_notes, write_notes_csv
+from utils.session import directory_mtime
+from utils.shared_store import SharedNotesStore, db_path
+
+# Files claim_next() tries before giving up when claimed files are missing
+CLAIM_ATTEMPTS = 20
+
+# Fold the journal back into pdf_notes.csv after this many changes
+COMPACT_EVERY = 200
 
 class FileHandler:
     def __init__(self):
@@ -11,11 +30,57 @@ class FileHandler:
         self.flags_dict = {}
         self.directory_callback = None
         self.sidebar = None  # Add this line to store sidebar reference
+        self.journal = None
+        # "csv" keeps notes in pdf_notes.csv; "sqlite" uses the shared
+        # pdf_notes.db store, which is also picked automatically once a
+        # directory has one
+        self.storage_backend = "csv"
+        self.operator = f"{getpass.getuser()}@{socket.gethostname()}"
+        self.shared_store = None
+        # Runs shared-store calls in order, off the Tk thread; see _store_call
+        self.store_worker = None
+        self._polling = False
+        self.progress = ProgressModel(self)
+        self.search_index = SearchIndex(self)
+        self.note_index = NoteIndex(self)
+        # With a MainThreadDispatcher set, directories are scanned in the
+        # background and the listing streams in batch by batch
+        self.dispatcher = None
+        self.scanner = None
+        self._directory_announced = False
+        self.files_changed_callback = None
+        self.files_modified_callback = None
+        self.files_added_callback = None
+        # Keep watching the directory for PDFs the scanners add or remove
+        self.watch_enabled = True
+        self.watcher = None
+        # Set of file names to list (e.g. written by reconcile.py); None lists every PDF
+        self.worklist = None
+        # Recursive workspace mode: list the PDFs of every folder below the
+        # selected one, as paths relative to it, with notes kept per folder
+        self.recursive = False
+        self.notes_shards = NotesShards(self, COMPACT_EVERY)
 
     def set_directory_callback(self, callback):
         """Set callback function to be called when directory is selected"""
         self.directory_callback = callback
 
+    def set_files_changed_callback(self, callback):
+        """Set callback function to be called when files are added to or removed from pdf_files"""
+        self.files_changed_callback = callback
+
+    def set_files_added_callback(self, callback):
+        """Set callback function to be called with the PDFs newly added to pdf_files"""
+        self.files_added_callback = callback
+
+    def set_files_modified_callback(self, callback):
+        """Set callback function to be called with PDFs rewritten in place"""
+        self.files_modified_callback = callback
+
+    @property
+    def scanning(self):
+        return self.scanner is not None
+
     def is_valid_pdf(self, filename):
         """Check if file is a valid PDF and not a hidden file"""
         # Exclude hidden files (starting with .)
@@ -25,12 +90,31 @@ class FileHandler:
         if filename.startswith('._'):
             return False
         # Check for .pdf extension (case insensitive)
-        return filename.lower().endswith('.pdf')
+        if not filename.lower().endswith('.pdf'):
+            return False
+        return self.worklist is None or filename in self.worklist
 
     def select_directory(self):
         """Select directory and load PDF files"""
-        self.current_directory = filedialog.askdirectory()
-        if self.current_directory:
+        directory = filedialog.askdirectory()
+        if directory:
+            self.load_directory(directory)
+            return True
+        return False
+
+    def load_directory(self, directory):
+        """Switch to directory, loading its notes and listing its PDFs"""
+        # Stop listing the previous directory and flush its journal
+        self.cancel_scan()
+        self.stop_watching()
+        self.close()
+        self.current_directory = directory
+
+        if self.recursive:
+            self._load_workspace(directory)
+            return
+
+        if self.dispatcher is None:
             # Filter out hidden files and get only valid PDFs
             self.pdf_files = [
                 f for f in os.listdir(self.current_directory)
@@ -38,49 +122,529 @@ class FileHandler:
             ]
             # Sort files alphabetically
             self.pdf_files.sort()
-            
+
             self.load_existing_notes()
-            
+
             if self.directory_callback:
                 self.directory_callback()
-            
-            return True
-        return False
+            self.start_watching()
+            return
+
+        self.pdf_files = []
+        self.load_existing_notes()
+        self._directory_announced = False
+        self.scanner = DirectoryScanner(
+            directory,
+            self.is_valid_pdf,
+            self.dispatcher,
+            self._on_scan_batch,
+            self._on_scan_done,
+        )
+        self.scanner.start()
+
+    def restore_directory(self, directory, listing, listing_mtime_ns):
+        """Reopen directory from a cached listing without waiting for a scan.
+
+        If the directory's mtime still matches the listing's, it is not
+        scanned at all. Otherwise the cached listing is shown right away and
+        a background scan reconciles it, as if the watcher had seen the
+        files come and go.
+        """
+        if self.dispatcher is None or listing is None or self.recursive:
+            self.load_directory(directory)
+            return
+
+        self.cancel_scan()
+        self.stop_watching()
+        self.close()
+        self.current_directory = directory
+        self.pdf_files = sorted(name for name in listing if self.is_valid_pdf(name))
+        self.load_existing_notes()
+        self._directory_announced = True
+        if self.directory_callback:
+            self.directory_callback()
+
+        if directory_mtime(directory) == listing_mtime_ns:
+            self.start_watching()
+            return
+
+        found = []
+        self.scanner = DirectoryScanner(
+            directory,
+            self.is_valid_pdf,
+            self.dispatcher,
+            found.extend,
+            lambda error: self._on_revalidated(found, error),
+        )
+        self.scanner.start()
+
+    def _on_revalidated(self, found, error):
+        self.scanner = None
+        if error:
+            # Keep the cached listing rather than emptying it
+            print(f"Error scanning directory: {error}")
+        else:
+            found = set(found)
+            listed = set(self.pdf_files)
+            self.add_files(found - listed)
+            self.remove_files(listed - found)
+        if self.files_changed_callback:
+            # Also lets the counter drop its "scanning" marker
+            self.files_changed_callback()
+        self.start_watching()
+
+    def _load_workspace(self, directory):
+        """Walk directory and its subfolders, streaming in folder after folder"""
+        self.pdf_files = []
+        self.notes_dict = {}
+        self.flags_dict = {}
+        self.journal = None
+        self.shared_store = None
+        self.progress.rebuild()
+        self.search_index.rebuild()
+        self.note_index.rebuild()
+        self._directory_announced = False
+
+        if self.dispatcher is None:
+            self._merge_folders(walk_workspace(
+                directory, self.is_valid_pdf, lambda path: read_notes(path, self.operator)
+            ))
+            self._directory_announced = True
+            if self.directory_callback:
+                self.directory_callback()
+            return
+
+        self.scanner = WorkspaceScanner(
+            directory,
+            self.is_valid_pdf,
+            self.dispatcher,
+            self._on_workspace_batch,
+            self._on_scan_done,
+            load_notes=lambda path: read_notes(path, self.operator),
+        )
+        self.scanner.start()
+
+    def _merge_folders(self, folders):
+        """Add the listings and notes of walked folders to the workspace"""
+        added = []
+        noted = []
+        for folder, names, notes, flags, journal in folders:
+            self.notes_shards.add(folder, journal, itertools.chain(names, notes, flags))
+            for name, note in notes.items():
+                self.notes_dict[join_folder(folder, name)] = note
+                noted.append(join_folder(folder, name))
+            for name, flagged in flags.items():
+                self.flags_dict[join_folder(folder, name)] = flagged
+            added.extend(join_folder(folder, name) for name in names)
+        added.sort()
+        self.pdf_files.extend(added)
+        self.pdf_files.sort()
+        for pdf_file in added:
+            self.progress.update(pdf_file)
+        self.search_index.add(added)
+        if added and self.files_added_callback:
+            self.files_added_callback(added)
+        for pdf_file in noted:
+            self.note_index.update(pdf_file, None)
+
+    def _on_workspace_batch(self, folders):
+        self._merge_folders(folders)
+        self._announce_batch()
+
+    def cancel_scan(self):
+        """Stop a background scan that is still running"""
+        if self.scanner:
+            self.scanner.cancel()
+            self.scanner = None
+
+    def _on_scan_batch(self, names):
+        # Merge the sorted batch into the sorted listing; Timsort finds the
+        # two runs, so this is a linear merge
+        names.sort()
+        self.pdf_files.extend(names)
+        self.pdf_files.sort()
+        for pdf_file in names:
+            self.progress.update(pdf_file)
+        self.search_index.add(names)
+        if names and self.files_added_callback:
+            self.files_added_callback(names)
+        self._announce_batch()
+
+    def _announce_batch(self):
+        if not self._directory_announced:
+            # Show the first documents while the scan continues
+            self._directory_announced = True
+            if self.directory_callback:
+                self.directory_callback()
+        elif self.files_changed_callback:
+            self.files_changed_callback()
+
+    def _on_scan_done(self, error):
+        self.scanner = None
+        if error:
+            print(f"Error scanning directory: {error}")
+        if self.shared_store:
+            if self.worklist is None and not error:
+                # The listing is complete: drop files removed while
+                # nobody had the directory open
+                self._store_call(self.shared_store.sync_files, list(self.pdf_files))
+            else:
+                self._store_call(self.shared_store.register_files, list(self.pdf_files))
+        if not self._directory_announced:
+            self._directory_announced = True
+            if self.directory_callback:
+                self.directory_callback()
+        elif self.files_changed_callback:
+            self.files_changed_callback()
+        self.start_watching()
+
+    def start_watching(self):
+        """Watch the current directory for PDFs being added or removed"""
+        self.stop_watching()
+        if not (self.watch_enabled and self.dispatcher and self.current_directory):
+            return
+        if self.recursive:
+            # Only the top folder could be watched; subfolders show up on reload
+            return
+        self.watcher = DirectoryWatcher(
+            self.current_directory,
+            self.is_valid_pdf,
+            self.dispatcher,
+            self._on_directory_change,
+            known_files=self.pdf_files,
+        )
+        self.watcher.start()
+
+    def watch_files(self, pdf_files):
+        """Have the watcher check these files for in-place rewrites on every poll"""
+        if self.watcher:
+            self.watcher.watch(pdf_files)
+
+    def stop_watching(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _on_directory_change(self, added, removed, modified):
+        changed = self.add_files(added) | self.remove_files(removed)
+        if changed and self.files_changed_callback:
+            self.files_changed_callback()
+        if modified and self.files_modified_callback:
+            self.files_modified_callback(modified)
+
+    def add_files(self, names):
+        """Insert PDFs into pdf_files at their sorted position; return True if any were new"""
+        added = []
+        for name in names:
+            i = bisect.bisect_left(self.pdf_files, name)
+            if i == len(self.pdf_files) or self.pdf_files[i] != name:
+                self.pdf_files.insert(i, name)
+                added.append(name)
+        for name in added:
+            self.progress.update(name)
+        self.search_index.add(added)
+        if added and self.files_added_callback:
+            self.files_added_callback(added)
+        if added and self.shared_store:
+            self._store_call(self.shared_store.register_files, added)
+        return bool(added)
+
+    def remove_files(self, names):
+        """Drop PDFs from pdf_files (their notes are kept); return True if any were listed"""
+        removed = []
+        for name in names:
+            i = bisect.bisect_left(self.pdf_files, name)
+            if i < len(self.pdf_files) and self.pdf_files[i] == name:
+                del self.pdf_files[i]
+                self.progress.remove(name)
+                self.search_index.remove([name])
+                removed.append(name)
+        if removed and self.shared_store:
+            self._store_call(self.shared_store.unregister_files, removed)
+        return bool(removed)
+
+    def _is_listed(self, pdf_file):
+        i = bisect.bisect_left(self.pdf_files, pdf_file)
+        return i < len(self.pdf_files) and self.pdf_files[i] == pdf_file
 
     def get_pdf_path(self, pdf_file):
         """Get full path for a PDF file"""
         return os.path.join(self.current_directory, pdf_file)
 
+    def set_note(self, pdf_file, note):
+        """Record a note for pdf_file and journal the change.
+
+        Returns the other files whose duplicate state changed with it.
+        """
+        old_note = self.notes_dict.get(pdf_file)
+        self.notes_dict[pdf_file] = note
+        self.progress.update(pdf_file)
+        self.search_index.update(pdf_file)
+        self._record("note", pdf_file, note)
+        return self.note_index.update(pdf_file, old_note)
+
+    def set_flag(self, pdf_file, flagged):
+        """Record the flag state of pdf_file and journal the change"""
+        self.flags_dict[pdf_file] = flagged
+        self.progress.update(pdf_file)
+        self._record("flag", pdf_file, "1" if flagged else "0")
+
+    def _record(self, kind, pdf_file, value):
+        if self.notes_shards.active:
+            self.notes_shards.record(kind, pdf_file, value)
+            return
+        if self.shared_store:
+            self._store_call(
+                self._write_shared, self.shared_store, self.journal, kind, pdf_file, value
+            )
+            return
+        if not self.journal:
+            return
+        try:
+            self.journal.append(kind, pdf_file, value)
+        except OSError as e:
+            # Fall back to a full rewrite so the change still reaches disk
+            print(f"Error writing notes journal: {e}")
+            self.save_to_csv()
+            return
+        if self.journal.records >= COMPACT_EVERY:
+            self.compact()
+
+    def _write_shared(self, store, journal, kind, pdf_file, value):
+        """Write one change to the shared store (on the store worker)"""
+        try:
+            if kind == "note":
+                store.set_note(pdf_file, value)
+            else:
+                store.set_flag(pdf_file, value == "1")
+            return
+        except sqlite3.Error as e:
+            print(f"Error writing shared notes store: {e}")
+        if not journal:
+            return
+        # Keep the change in the local journal rather than losing it; it is
+        # folded into pdf_notes.csv when the directory is closed
+        try:
+            journal.append(kind, pdf_file, value)
+        except OSError as e:
+            print(f"Error writing notes journal: {e}")
+
+    def _store_call(self, fn, *args, on_done=None):
+        """Run fn(*args) on the shared-store worker.
+
+        SQLite on a share can wait seconds for another operator's lock, so
+        store I/O stays off the Tk thread. Calls run one at a time, in the
+        order they were made; on_done(result, error) then runs on the Tk
+        thread. Without a worker (no dispatcher) the call runs inline.
+        """
+        def run():
+            try:
+                result, error = fn(*args), None
+            except sqlite3.Error as e:
+                result, error = None, e
+            if on_done is None:
+                if error:
+                    print(f"Error updating shared notes store: {error}")
+            elif self.store_worker is None:
+                on_done(result, error)
+            else:
+                self.dispatcher.call_soon(on_done, result, error)
+
+        if self.store_worker is None:
+            run()
+        else:
+            self.store_worker.submit(run)
+
+    def _stop_store_worker(self):
+        """Wait for queued store calls to finish and stop the worker"""
+        if self.store_worker is not None:
+            self.store_worker.shutdown(wait=True)
+            self.store_worker = None
+
+    def compact(self):
+        """Fold journaled changes into pdf_notes.csv and clear the journal"""
+        if self.notes_shards.active:
+            self.notes_shards.compact()
+        elif self.journal and self.save_to_csv():
+            self.journal.truncate()
+
+    def export_csv(self):
+        """Write pdf_notes.csv, including other operators' changes to the shared store"""
+        if not self.shared_store:
+            self.save_to_csv()
+            return
+        store = self.shared_store
+
+        def fetched(changes, error):
+            if store is not self.shared_store:
+                return
+            if error:
+                print(f"Error reading shared notes store: {error}")
+            else:
+                self._apply_shared_changes(changes)
+            self.save_to_csv()
+
+        self._store_call(store.changes_since, on_done=fetched)
+
+    def poll_shared_changes(self, on_changed):
+        """Apply changes other operators made to the shared store.
+
+        The store is read on its worker; on_changed(files) then runs on the
+        Tk thread if any files changed. A poll is skipped while the previous
+        one is still waiting on the store.
+        """
+        if not self.shared_store or self._polling:
+            return
+        self._polling = True
+        store = self.shared_store
+
+        def fetched(changes, error):
+            self._polling = False
+            if store is not self.shared_store:
+                return
+            if error:
+                print(f"Error reading shared notes store: {error}")
+                return
+            changed = self._apply_shared_changes(changes)
+            if changed:
+                on_changed(changed)
+
+        self._store_call(store.changes_since, on_done=fetched)
+
+    def _apply_shared_changes(self, changes):
+        """Apply rows from changes_since(); return the changed files"""
+        affected = set()
+        for pdf_file, note, flagged in changes:
+            old_note = self.notes_dict.get(pdf_file)
+            if note:
+                self.notes_dict[pdf_file] = note
+            else:
+                self.notes_dict.pop(pdf_file, None)
+            self.flags_dict[pdf_file] = flagged
+            self.progress.update(pdf_file)
+            self.search_index.update(pdf_file)
+            affected |= self.note_index.update(pdf_file, old_note)
+        changed = [pdf_file for pdf_file, _, _ in changes]
+        # Rows whose duplicate marking changed need restyling too
+        return changed + sorted(affected.difference(changed))
+
+    def claim_next(self, on_claimed, after="", attempts=CLAIM_ATTEMPTS):
+        """Claim the next unfinished file in the shared store for on_claimed.
+
+        on_claimed(pdf_file or None) runs on the Tk thread. A claimed file
+        that is no longer on disk (removed while this viewer wasn't
+        watching) is dropped from the store, and one this viewer doesn't
+        list (outside its worklist) is passed over; the next one is claimed
+        instead.
+        """
+        store = self.shared_store
+        if not store:
+            on_claimed(None)
+            return
+
+        def claimed(pdf_file, error):
+            if store is not self.shared_store:
+                return
+            if error:
+                print(f"Error claiming from shared notes store: {error}")
+            elif pdf_file is not None and not self._is_listed(pdf_file):
+                if attempts > 1:
+                    self.claim_next(on_claimed, pdf_file, attempts - 1)
+                    return
+                self._store_call(store.release_claims)
+                pdf_file = None
+            on_claimed(pdf_file)
+
+        self._store_call(self._claim_existing, store, after, on_done=claimed)
+
+    def _claim_existing(self, store, after):
+        """Claim the next file that is still on disk (on the store worker)"""
+        for _ in range(CLAIM_ATTEMPTS):
+            pdf_file = store.claim_next(after)
+            if pdf_file is None or os.path.exists(self.get_pdf_path(pdf_file)):
+                return pdf_file
+            store.unregister_files([pdf_file])
+            after = pdf_file
+        store.release_claims()
+        return None
+
+    def close(self):
+        """Compact and close the notes storage of the current directory"""
+        self.stop_watching()
+        if self.shared_store:
+            # Let queued writes reach the store before exporting from it
+            self._stop_store_worker()
+            self._polling = False
+            try:
+                self._apply_shared_changes(self.shared_store.changes_since())
+                self.save_to_csv()
+                self.shared_store.release_claims()
+                self.shared_store.close()
+            except sqlite3.Error as e:
+                print(f"Error closing shared notes store: {e}")
+            self.shared_store = None
+        if self.journal:
+            if self.journal.records:
+                self.compact()
+            self.journal.close()
+        self.notes_shards.close()
+
     def save_to_csv(self):
-        """Save notes and flags to CSV file"""
+        """Atomically rewrite the CSV file with all notes and flags"""
         if not self.current_directory:
-            return
+            return False
+        if self.notes_shards.active:
+            # A workspace keeps one CSV per folder; only changed ones are stale
+            return self.notes_shards.compact()
 
-        csv_path = os.path.join(self.current_directory, "pdf_notes.csv")
-        with open(csv_path, "w", newline="", encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["PDF File", "Note", "Flagged"])
-            for pdf_file in self.pdf_files:
-                note = self.notes_dict.get(pdf_file, "")
-                flagged = "1" if self.flags_dict.get(pdf_file, False) else "0"
-                writer.writerow([pdf_file, note, flagged])
+        # Keep rows for files that are not listed (e.g. removed since) so
+        # their notes survive a rewrite
+        listed = set(self.pdf_files)
+        unlisted = sorted(
+            (set(self.notes_dict) | set(self.flags_dict)) - listed
+        )
+        # The shared store holds the current values; otherwise the journal
+        # knows how recent each one is
+        stamps = self.journal.stamps if self.journal and not self.shared_store else None
+        return write_notes_csv(
+            self.current_directory,
+            (
+                (pdf_file, self.notes_dict.get(pdf_file, ""), self.flags_dict.get(pdf_file, False))
+                for pdf_file in self.pdf_files + unlisted
+            ),
+            stamps,
+        )
 
     def load_existing_notes(self):
-        """Load existing notes and flags from CSV file"""
-        csv_path = os.path.join(self.current_directory, "pdf_notes.csv")
-        self.notes_dict = {}
-        self.flags_dict = {}
-        if os.path.exists(csv_path):
-            with open(csv_path, "r", newline="", encoding='utf-8') as f:
-                reader = csv.reader(f)
-                header = next(reader)  # Skip header row
-                for row in reader:
-                    if len(row) >= 3:
-                        pdf_file, note, flagged = row
-                        if note:
-                            self.notes_dict[pdf_file] = note
-                        self.flags_dict[pdf_file] = flagged == "1"
-                    elif len(row) == 2:
-                        pdf_file, note = row
-                        if note:
-                            self.notes_dict[pdf_file] = note
\ No newline at end of file
+        """Load notes and flags from the shared store or the CSV file and journal"""
+        self._load_csv_notes()
+        if self.storage_backend == "sqlite" or os.path.exists(
+            db_path(self.current_directory)
+        ):
+            try:
+                self._open_shared_store()
+            except sqlite3.Error as e:
+                print(f"Error opening shared notes store, using CSV: {e}")
+                self.shared_store = None
+        self.progress.rebuild()
+        self.search_index.rebuild()
+        self.note_index.rebuild()
+
+    def _open_shared_store(self):
+        store = SharedNotesStore(self.current_directory, self.operator)
+        if store.is_empty():
+            # First operator on this directory: seed from the CSV and journal
+            store.import_rows(self.notes_dict, self.flags_dict)
+        store.register_files(self.pdf_files)
+        self.notes_dict, self.flags_dict = store.load()
+        self.shared_store = store
+        if self.dispatcher is not None:
+            self.store_worker = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="notes-store"
+            )
+
+    def _load_csv_notes(self):
+        """Load existing notes and flags from CSV file and replay the journal"""
+        self.notes_dict, self.flags_dict, self.journal = read_notes(
+            self.current_directory, self.operator
+        )
@@ -0,0 +1,46 @@
+# utils/filesystem.py
+import ctypes
+import os
+import sys
+
+# Filesystem types that live on another host
+NETWORK_FILESYSTEMS = {
+    "cifs", "smb3", "smbfs", "nfs", "nfs4", "afs", "9p",
+    "fuse.sshfs", "fuse.rclone", "davfs",
+}
+
+
+def filesystem_type(path):
+    """Return the Linux filesystem type that path lives on, or None"""
+    path = os.path.realpath(path)
+    best, fs_type = "", None
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace("\\040", " ")
+                if (
+                    path == mount_point
+                    or path.startswith(mount_point.rstrip("/") + "/")
+                ) and len(mount_point) > len(best):
+                    best, fs_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return fs_type
+
+
+def is_network_path(path):
+    """Best-effort check whether path is on a network share"""
+    if sys.platform == "win32":
+        path = os.path.abspath(path)
+        if path.startswith("\\\\"):
+            return True
+        drive = os.path.splitdrive(path)[0]
+        DRIVE_REMOTE = 4
+        try:
+            return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+        except (AttributeError, OSError):
+            return False
+    return filesystem_type(path) in NETWORK_FILESYSTEMS
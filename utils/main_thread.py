@@ -0,0 +1,33 @@
+# utils/main_thread.py
+import queue
+
+
+class MainThreadDispatcher:
+    """Run callbacks posted from worker threads on the Tk main loop.
+
+    Tk widgets may only be touched from the main thread, so background
+    scans and renders post their results here instead of calling into the
+    UI directly.
+    """
+
+    def __init__(self, root, interval=30):
+        self.root = root
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.root.after(self.interval, self._poll)
+
+    def call_soon(self, callback, *args):
+        """Schedule callback(*args) on the main thread; safe from any thread"""
+        self.queue.put((callback, args))
+
+    def _poll(self):
+        try:
+            while True:
+                callback, args = self.queue.get_nowait()
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Error in main-thread callback: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(self.interval, self._poll)
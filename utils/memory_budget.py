@@ -0,0 +1,87 @@
+# utils/memory_budget.py
+import threading
+
+# Enough for a few dozen grayscale crops plus an inspection view; raise it
+# on workstations with RAM to spare (main.py --memory-mb)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def image_bytes(img):
+    """Approximate in-memory size of a crop, tile or Tk image"""
+    if img is None:
+        return 0
+    if isinstance(img, tuple):  # (x, y, crop) tiles from TileRenderer
+        return image_bytes(img[-1])
+    data = getattr(img, "data", None)
+    if isinstance(data, bytes):  # PPMCrop
+        return len(data)
+    if hasattr(img, "getbands"):  # PIL image
+        return img.width * img.height * len(img.getbands())
+    # Tk photo images hold 4 bytes per pixel whatever the source
+    return img.width() * img.height() * 4
+
+
+class MemoryBudget:
+    """One byte budget shared by every in-memory image holder.
+
+    RenderCache instances register themselves and are trimmed, least
+    recently used entries first, whenever the total goes over max_bytes.
+    Holders that cannot drop images (the displayed crop, the tiles on the
+    inspection canvas) report their usage with set_usage() so the caches
+    make room for them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.caches = []
+        self.fixed = {}  # holder name -> bytes reported with set_usage()
+        self._lock = threading.Lock()
+
+    def register(self, cache):
+        with self._lock:
+            self.caches.append(cache)
+
+    def unregister(self, cache):
+        with self._lock:
+            if cache in self.caches:
+                self.caches.remove(cache)
+
+    def charge(self, nbytes):
+        with self._lock:
+            self.used += nbytes
+
+    def release(self, nbytes):
+        with self._lock:
+            self.used -= nbytes
+
+    def set_usage(self, holder, nbytes):
+        """Record the current size of a holder that is not a cache"""
+        with self._lock:
+            self.used += nbytes - self.fixed.get(holder, 0)
+            self.fixed[holder] = nbytes
+        self.reclaim()
+
+    @property
+    def over(self):
+        return self.used > self.max_bytes
+
+    def available(self):
+        """Bytes the caches may use in total once fixed holders are accounted for"""
+        with self._lock:
+            return max(0, self.max_bytes - sum(self.fixed.values()))
+
+    def reclaim(self):
+        """Evict cached images, oldest first in each cache, until back under budget"""
+        while self.over:
+            with self._lock:
+                caches = list(self.caches)
+            # Each cache gives up one entry per round so no single holder is
+            # emptied while others stay full
+            evicted = False
+            for cache in caches:
+                evicted = cache.evict_oldest() or evicted
+                if not self.over:
+                    return
+            if not evicted:
+                return
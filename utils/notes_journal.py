@@ -0,0 +1,169 @@
+# utils/notes_journal.py
+import csv
+import glob
+import os
+import re
+import time
+
+# Journal shared by every viewer before journals were kept per operator;
+# still replayed, and used when no owner is given
+JOURNAL_NAME = "pdf_notes.journal"
+
+# Written as the last field of every record; a record without it was torn by
+# a crash mid-write and is ignored on replay
+END_MARKER = "end"
+
+# Records are (kind, file, value, stamp, END_MARKER); journals written before
+# records were stamped lack the stamp, which then counts as 0
+RECORD_FIELDS = 5
+
+
+def journal_name(owner):
+    """Return the journal file name of one operator (e.g. "user@host")"""
+    return "pdf_notes.{}.journal".format(re.sub(r"[^A-Za-z0-9_.@-]", "_", owner))
+
+
+def journal_paths(directory):
+    """Return every journal in directory"""
+    return sorted(glob.glob(os.path.join(glob.escape(directory), "pdf_notes*.journal")))
+
+
+def parse_stamp(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _read_records(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) == RECORD_FIELDS and row[-1] == END_MARKER:
+                yield row[0], row[1], row[2], parse_stamp(row[3])
+            elif len(row) == 4 and row[3] == END_MARKER:
+                yield row[0], row[1], row[2], 0
+
+
+class NotesJournal:
+    """Append-only log of note/flag changes that sits next to pdf_notes.csv.
+
+    Each save appends one small record instead of rewriting the whole CSV.
+    The records are replayed on load and folded back into the CSV by
+    FileHandler.compact().
+
+    Each operator appends to a journal of their own, so a viewer only ever
+    truncates its own file and never one another viewer is appending to.
+    replay_all() reads everyone's journals, since their changes may not be
+    in the CSV yet.
+
+    Every record carries a stamp (nanoseconds since the epoch, and always
+    above any stamp this journal has seen), and pdf_notes.csv keeps the
+    stamps of its values, so a note or flag only ever replaces an older
+    one whatever order the files are read in. `stamps` holds the stamp of
+    each (kind, file) value loaded or written through this journal.
+    """
+
+    def __init__(self, directory, owner=None):
+        self.directory = directory
+        self.path = os.path.join(directory, journal_name(owner) if owner else JOURNAL_NAME)
+        self.records = 0
+        self.stamps = {}  # (kind, pdf_file) -> stamp of the value held
+        self.last_stamp = 0
+        self._legacy_size = None  # size of the old shared journal when replayed
+        self._file = None
+        self._writer = None
+
+    def observe(self, stamp):
+        """Keep later stamps above one seen elsewhere (e.g. from a clock ahead of ours)"""
+        self.last_stamp = max(self.last_stamp, stamp)
+
+    def next_stamp(self):
+        self.last_stamp = max(time.time_ns(), self.last_stamp + 1)
+        return self.last_stamp
+
+    def append(self, kind, pdf_file, value):
+        """Durably append one change record ("note" or "flag")"""
+        # Stamped before writing: if the append fails, the CSV rewrite that
+        # follows still has to win over older values
+        stamp = self.stamps[(kind, pdf_file)] = self.next_stamp()
+        if self._file is None:
+            torn = self._ends_mid_record()
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            if torn:
+                # Terminate a torn record so it cannot swallow the next one
+                self._file.write("\r\n")
+        self._writer.writerow([kind, pdf_file, value, stamp, END_MARKER])
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records += 1
+
+    def _ends_mid_record(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False
+
+    def replay(self):
+        """Yield (kind, pdf_file, value, stamp) for every complete record in the journal"""
+        self.records = 0
+        if not os.path.exists(self.path):
+            return
+        for record in _read_records(self.path):
+            self.records += 1
+            yield record
+
+    def replay_all(self):
+        """Yield the records of every operator's journal in the directory;
+        records counts only this journal's own"""
+        self.records = 0
+        for path in journal_paths(self.directory):
+            if path == self.path:
+                yield from self.replay()
+                continue
+            try:
+                if os.path.basename(path) == JOURNAL_NAME:
+                    self._legacy_size = os.path.getsize(path)
+                yield from _read_records(path)
+            except OSError as e:
+                print(f"Error reading notes journal {os.path.basename(path)}: {e}")
+
+    def truncate(self):
+        """Discard all records once they have been compacted into the CSV"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # e.g. open in a virus scanner on Windows; replaying it again
+            # later is harmless, the CSV holds the same or newer values
+            print(f"Error removing notes journal: {e}")
+            return False
+        self.records = 0
+        self._drop_legacy()
+        return True
+
+    def _drop_legacy(self):
+        # The old shared journal has no owner left to clear it; once its
+        # records are in the CSV just written, drop it unless it grew since
+        legacy = os.path.join(self.directory, JOURNAL_NAME)
+        if self._legacy_size is None or legacy == self.path:
+            return
+        try:
+            if os.path.getsize(legacy) == self._legacy_size:
+                os.remove(legacy)
+        except OSError:
+            pass
+        self._legacy_size = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
@@ -0,0 +1,211 @@
+# utils/notes_shards.py
+import csv
+import os
+import time
+
+from utils.notes_journal import NotesJournal, parse_stamp
+
+NOTES_NAME = "pdf_notes.csv"
+# The last two columns hold the stamps of the note and flag (see NotesJournal)
+NOTES_HEADER = ["PDF File", "Note", "Flagged", "Note Updated", "Flag Updated"]
+
+
+def split_folder(pdf_file):
+    """Split a workspace-relative name ("box 12/scan.pdf") into (folder, file name)"""
+    folder, _, name = pdf_file.rpartition("/")
+    return folder, name
+
+
+def join_folder(folder, name):
+    return f"{folder}/{name}" if folder else name
+
+
+def read_csv_rows(directory):
+    """Yield (file, note, flagged, note stamp, flag stamp) for each row of a
+    directory's pdf_notes.csv; flagged is None in old two-column rows, and
+    stamps are 0 in files written before values were stamped"""
+    csv_path = os.path.join(directory, NOTES_NAME)
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, "r", newline="", encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header row
+        for row in reader:
+            if len(row) >= 3:
+                note_stamp = parse_stamp(row[3]) if len(row) > 3 else 0
+                flag_stamp = parse_stamp(row[4]) if len(row) > 4 else 0
+                yield row[0], row[1], row[2] == "1", note_stamp, flag_stamp
+            elif len(row) == 2:
+                yield row[0], row[1], None, 0, 0
+
+
+def read_notes(directory, owner=None):
+    """Read a directory's pdf_notes.csv and replay its journals.
+
+    Returns (notes, flags, journal), keyed by file name; the journal is
+    owner's, ready for appending, knows how many records are pending and
+    holds the stamp of every value. Of the CSV's value and each journal's
+    records, the one with the newest stamp wins.
+    """
+    notes = {}
+    flags = {}
+    journal = NotesJournal(directory, owner)
+    stamps = journal.stamps
+    for pdf_file, note, flagged, note_stamp, flag_stamp in read_csv_rows(directory):
+        if note:
+            notes[pdf_file] = note
+        stamps[("note", pdf_file)] = note_stamp
+        if flagged is not None:
+            flags[pdf_file] = flagged
+            stamps[("flag", pdf_file)] = flag_stamp
+
+    for kind, pdf_file, value, stamp in journal.replay_all():
+        journal.observe(stamp)
+        # Records of equal stamps (only unstamped ones) apply in file order
+        if stamp < stamps.get((kind, pdf_file), 0):
+            continue
+        stamps[(kind, pdf_file)] = stamp
+        if kind == "note":
+            if value:
+                notes[pdf_file] = value
+            else:
+                notes.pop(pdf_file, None)
+        elif kind == "flag":
+            flags[pdf_file] = value == "1"
+    return notes, flags, journal
+
+
+def _merge_with_disk(directory, rows, stamps):
+    """Yield rows as CSV fields, keeping any value the CSV on disk has newer.
+
+    Another viewer may have compacted since this one loaded the directory;
+    its newer values (and rows for files this viewer doesn't know) stay.
+    """
+    try:
+        disk = {row[0]: row[1:] for row in read_csv_rows(directory)}
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        print(f"Error reading notes CSV before saving: {e}")
+        disk = {}
+    now = time.time_ns()
+    for pdf_file, note, flagged in rows:
+        if stamps is None:
+            note_stamp = flag_stamp = now
+        else:
+            note_stamp = stamps.get(("note", pdf_file), 0)
+            flag_stamp = stamps.get(("flag", pdf_file), 0)
+        on_disk = disk.pop(pdf_file, None)
+        if on_disk:
+            disk_note, disk_flagged, disk_note_stamp, disk_flag_stamp = on_disk
+            if disk_note_stamp > note_stamp:
+                note, note_stamp = disk_note, disk_note_stamp
+            if disk_flagged is not None and disk_flag_stamp > flag_stamp:
+                flagged, flag_stamp = disk_flagged, disk_flag_stamp
+        yield pdf_file, note, flagged, note_stamp, flag_stamp
+    for pdf_file, (note, flagged, note_stamp, flag_stamp) in disk.items():
+        yield pdf_file, note, bool(flagged), note_stamp, flag_stamp
+
+
+def write_notes_csv(directory, rows, stamps=None):
+    """Atomically rewrite a directory's pdf_notes.csv from (file, note, flagged) rows.
+
+    stamps maps (kind, file) to the stamp of each value (NotesJournal.stamps);
+    None means the values are current, e.g. exported from the shared store.
+    """
+    csv_path = os.path.join(directory, NOTES_NAME)
+    tmp_path = csv_path + ".tmp"
+    try:
+        merged = list(_merge_with_disk(directory, rows, stamps))
+        with open(tmp_path, "w", newline="", encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(NOTES_HEADER)
+            for pdf_file, note, flagged, note_stamp, flag_stamp in merged:
+                writer.writerow([pdf_file, note, "1" if flagged else "0", note_stamp, flag_stamp])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, csv_path)
+        return True
+    except OSError as e:
+        # e.g. the CSV is open in a spreadsheet; the journal keeps the data
+        print(f"Error saving notes CSV: {e}")
+        return False
+
+
+class NotesShards:
+    """One pdf_notes.csv and journal per folder of a recursive workspace.
+
+    FileHandler keys notes by path relative to the workspace root; each
+    folder's own files key them by bare file name, so a folder still reads
+    correctly when it is opened on its own. A save appends to its folder's
+    journal only, and compaction rewrites only the folders that changed.
+    """
+
+    def __init__(self, file_handler, compact_every):
+        self.file_handler = file_handler
+        self.compact_every = compact_every
+        self.journals = {}  # folder -> NotesJournal
+        self.names = {}  # folder -> names listed or noted there, for its CSV rows
+
+    @property
+    def active(self):
+        return bool(self.journals)
+
+    def folder_path(self, folder):
+        root = self.file_handler.current_directory
+        return os.path.join(root, *folder.split("/")) if folder else root
+
+    def add(self, folder, journal, names):
+        """Take over the journal of a folder read by read_notes(), along with the
+        names of its listed files and of those with a note or flag"""
+        self.journals[folder] = journal
+        self.names.setdefault(folder, set()).update(names)
+
+    def record(self, kind, pdf_file, value):
+        """Journal one note/flag change in its folder's shard"""
+        folder, name = split_folder(pdf_file)
+        self.names.setdefault(folder, set()).add(name)
+        journal = self.journals.get(folder)
+        if journal is None:
+            journal = self.journals[folder] = NotesJournal(
+                self.folder_path(folder), self.file_handler.operator
+            )
+        try:
+            journal.append(kind, name, value)
+        except OSError as e:
+            # Fall back to a rewrite so the change still reaches disk
+            print(f"Error writing notes journal: {e}")
+            self.compact([folder])
+            return
+        if journal.records >= self.compact_every:
+            self.compact([folder])
+
+    def _rows(self, folder):
+        """Return the CSV rows of one folder, from its own names only"""
+        notes_dict = self.file_handler.notes_dict
+        flags_dict = self.file_handler.flags_dict
+        rows = []
+        for name in sorted(self.names.get(folder, ())):
+            pdf_file = join_folder(folder, name)
+            rows.append((name, notes_dict.get(pdf_file, ""), flags_dict.get(pdf_file, False)))
+        return rows
+
+    def compact(self, folders=None):
+        """Fold journaled changes into each folder's pdf_notes.csv (by default
+        every folder with pending changes); returns True if all were written"""
+        if folders is None:
+            folders = [f for f, journal in self.journals.items() if journal.records]
+        written = True
+        for folder in folders:
+            journal = self.journals[folder]
+            if write_notes_csv(self.folder_path(folder), self._rows(folder), journal.stamps):
+                journal.truncate()
+            else:
+                written = False
+        return written
+
+    def close(self):
+        """Compact every changed folder and close the journals"""
+        self.compact()
+        for journal in self.journals.values():
+            journal.close()
+        self.journals = {}
+        self.names = {}
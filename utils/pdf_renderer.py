@@ -1,46 +1,273 @@
 # utils/pdf_renderer.py
-import fitz
-from PIL import Image, ImageTk
+import threading
+import time
+import tkinter as tk
+from contextlib import nullcontext
+
+# fitz and PIL are imported where they are used: together they take a large
+# part of a second to load, which would otherwise delay the first window
+
+# PyMuPDF is not thread-safe, so every fitz call goes through this lock once
+# render-ahead workers are rendering alongside the UI thread
+FITZ_LOCK = threading.Lock()
+
+
+# Render modes: "fixed" rasterizes at self.zoom and downscales the result,
+# "targeted" picks the matrix so the pixmap comes out near target_width,
+# "auto" is targeted with extra oversampling for large-format pages, and
+# "exact" rasterizes straight at target_width so no resize is needed.
+RENDER_MODES = ("auto", "targeted", "fixed", "exact")
+
+# Color modes: full "rgb", 8-bit "gray", and "bilevel", which is gray
+# thresholded to pure black and white. Gray pixmaps are a third of the size
+# of RGB ones, which suits black-and-white scans.
+COLOR_MODES = ("rgb", "gray", "bilevel")
+
+
+def threshold_table(threshold):
+    """Return a bytes.translate() table mapping gray levels below threshold to
+    black and the rest to white"""
+    return bytes(0 if v < threshold else 255 for v in range(256))
+
+
+class PPMCrop:
+    """A rendered crop kept as binary PPM (RGB) or PGM (gray) bytes, which Tk
+    loads without PIL.
+
+    Produced when the pixmap already has the display size, so the samples go
+    from fitz to Tk with a single copy each way instead of through a PIL
+    image and ImageTk.
+    """
+
+    __slots__ = ("width", "height", "data", "mode", "offset")
+
+    def __init__(self, width, height, data):
+        self.width = width
+        self.height = height
+        self.data = data
+        self.mode = "L" if data.startswith(b"P5") else "RGB"
+        # The samples follow the "P6\n<w> <h>\n255\n" (or P5) header
+        self.offset = len(data) - width * height * len(self.mode)
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def to_pil(self):
+        """Return the crop as a PIL image, "RGB" or "L" like the data (for PNG
+        encoding, export, etc.)"""
+        from PIL import Image
+
+        return Image.frombuffer(
+            self.mode, self.size, memoryview(self.data)[self.offset:], "raw", self.mode, 0, 1
+        )
+
+
+def preload_libraries():
+    """Import fitz and PIL ahead of the first render, e.g. from a background thread"""
+    import fitz  # noqa: F401
+    from PIL import Image, ImageTk  # noqa: F401
 
 
 class PDFRenderer:
     def __init__(self):
         self.zoom = 30
         self.target_width = 1200
+        # Displayed portion of the first page as fractions of its width/height
+        # (x0, y0, x1, y1): the right half, top 30%
+        self.clip = (0.5, 0.0, 1.0, 0.3)
+        self.render_mode = "auto"
+        # Pixmap width relative to target_width in targeted mode; the LANCZOS
+        # pass takes it the rest of the way down
+        self.oversample = 2.0
+        # Clips wider than this (in points, i.e. pages wider than 11in such as
+        # tabloid/A3) hold fine print in fewer target pixels, so auto mode
+        # oversamples them harder
+        self.high_quality_clip_width = 396
+        self.high_quality_oversample = 4.0
+        # Hand pixmaps that need no resize to Tk as PPM bytes (see PPMCrop);
+        # everything else goes through PIL
+        self.direct_photo = True
+        self.color_mode = "rgb"
+        # Gray level (0-255) below which a pixel turns black in bilevel mode
+        self.bilevel_threshold = 160
+        # Optional DocumentPool keeping documents open between renders
+        self.documents = None
+        # Optional RenderStats receiving per-stage timings
+        self.stats = None
+        self._renders = 0  # render_image() calls in progress
+        self._idle = threading.Condition()
 
-    def render_pdf(self, pdf_path):
-        try:
-            doc = fitz.open(pdf_path)
-            page = doc[0]
-            rect = page.rect
+    def clip_rect(self, page_rect):
+        """Return the top-right portion of the page that gets displayed"""
+        import fitz
+
+        x0, y0, x1, y1 = self.clip
+        return fitz.Rect(
+            page_rect.width * x0,
+            page_rect.height * y0,
+            page_rect.width * x1,
+            page_rect.height * y1,
+        )
 
-            # Focus on top-right portion
-            top_right_rect = fitz.Rect(
-                rect.width * 0.5, 0, rect.width, rect.height * 0.3
+    def zoom_for(self, clip):
+        """Return the zoom factor used to rasterize clip in the current mode"""
+        if self.render_mode == "fixed" or clip.width <= 0:
+            return self.zoom
+        if self.render_mode == "exact":
+            # One pixel of slack: fitz rounds the clip outwards to whole pixels
+            return min(self.zoom, (self.target_width - 1) / clip.width)
+
+        oversample = self.oversample
+        if (
+            self.render_mode == "auto"
+            and clip.width > self.high_quality_clip_width
+        ):
+            oversample = self.high_quality_oversample
+
+        # Never rasterize finer than the fixed high-quality path would
+        return min(self.zoom, self.target_width * oversample / clip.width)
+
+    def timed(self, stage):
+        """Context manager timing stage into self.stats, if instrumentation is on"""
+        return self.stats.time(stage) if self.stats else nullcontext()
+
+    def cache_signature(self):
+        """Return a string identifying every parameter that affects the output"""
+        return "|".join(
+            str(value)
+            for value in (
+                self.clip,
+                self.render_mode,
+                self.zoom,
+                self.target_width,
+                self.oversample,
+                self.high_quality_clip_width,
+                self.high_quality_oversample,
+                self.color_mode,
+                self.bilevel_threshold,
             )
+        )
+
+    def colorspace(self):
+        import fitz
 
-            # Create matrix for zoom
-            mat = fitz.Matrix(self.zoom, self.zoom)
+        return fitz.csRGB if self.color_mode == "rgb" else fitz.csGRAY
 
-            # Get pixmap
-            pix = page.get_pixmap(matrix=mat, clip=top_right_rect)
+    def _threshold_table(self):
+        return threshold_table(self.bilevel_threshold)
 
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    def render_image(self, pdf_path):
+        """Render the top-right crop of the first page.
 
-            # Resize if needed
-            if img.width > self.target_width:
-                ratio = self.target_width / img.width
-                target_height = int(img.height * ratio)
-                img = img.resize(
-                    (self.target_width, target_height), Image.Resampling.LANCZOS
+        Returns a PPMCrop when the pixmap needs no resize and direct_photo is
+        on, otherwise a PIL image. Safe to call from worker threads; raises
+        on failure.
+        """
+        with self._idle:
+            self._renders += 1
+        try:
+            return self._render_image(pdf_path)
+        finally:
+            with self._idle:
+                self._renders -= 1
+                if not self._renders:
+                    self._idle.notify_all()
+
+    def wait_idle(self):
+        """Block until no render is in progress, so background work can yield to renders"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._renders)
+
+    def _render_image(self, pdf_path):
+        import fitz
+        from PIL import Image
+
+        pool = self.documents
+        # Read the file before taking the lock, so a slow share doesn't hold
+        # up renders of files already in memory
+        open_start = time.perf_counter()
+        if pool:
+            data = pool.fetch(pdf_path)
+        else:
+            with open(pdf_path, "rb") as f:
+                data = f.read()
+        read_ms = (time.perf_counter() - open_start) * 1000
+        with FITZ_LOCK:
+            # "open" counts the read and the parse, not the wait for the lock
+            parse_start = time.perf_counter()
+            if pool:
+                doc = pool.document(pdf_path, data)
+            else:
+                doc = fitz.open(stream=data, filetype="pdf")
+            if self.stats:
+                self.stats.record(
+                    "open", read_ms + (time.perf_counter() - parse_start) * 1000
                 )
+            try:
+                page = doc[0]
+
+                # Focus on top-right portion
+                top_right_rect = self.clip_rect(page.rect)
 
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(img)
+                # Create matrix for zoom
+                zoom = self.zoom_for(top_right_rect)
+                mat = fitz.Matrix(zoom, zoom)
 
-            doc.close()
-            return photo
+                # Get pixmap
+                with self.timed("pixmap"):
+                    pix = page.get_pixmap(
+                        matrix=mat,
+                        clip=top_right_rect,
+                        colorspace=self.colorspace(),
+                        alpha=False,
+                    )
+
+                convert_start = time.perf_counter()
+                bilevel = self.color_mode == "bilevel"
+                if self.direct_photo and pix.width <= self.target_width:
+                    if bilevel:
+                        header = f"P5\n{pix.width} {pix.height}\n255\n".encode("ascii")
+                        data = header + pix.samples.translate(self._threshold_table())
+                    else:
+                        data = pix.tobytes("ppm")
+                    img = PPMCrop(pix.width, pix.height, data)
+                    bilevel = False
+                else:
+                    # Convert to PIL Image
+                    mode = "RGB" if pix.n == 3 else "L"
+                    img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+            finally:
+                if not pool:
+                    doc.close()
+
+        # Resize if needed
+        if img.width > self.target_width:
+            ratio = self.target_width / img.width
+            target_height = int(img.height * ratio)
+            img = img.resize(
+                (self.target_width, target_height), Image.Resampling.LANCZOS
+            )
+        if bilevel:
+            # Threshold after resizing so thin strokes survive the downscale
+            img = img.point(list(self._threshold_table()))
+        if self.stats:
+            self.stats.record("convert", (time.perf_counter() - convert_start) * 1000)
+
+        return img
+
+    def to_photo(self, img):
+        """Convert a rendered crop to a Tk image (Tk main thread only)"""
+        with self.timed("photo"):
+            if isinstance(img, PPMCrop):
+                return tk.PhotoImage(data=img.data, format="PPM")
+            from PIL import ImageTk
+
+            return ImageTk.PhotoImage(img)
+
+    def render_pdf(self, pdf_path):
+        try:
+            return self.to_photo(self.render_image(pdf_path))
 
         except Exception as e:
             print(f"Error rendering PDF: {e}")
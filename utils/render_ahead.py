@@ -0,0 +1,131 @@
+# utils/render_ahead.py
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+class RenderAhead:
+    """Background worker pool that prerenders neighbouring PDFs into a RenderCache"""
+
+    def __init__(self, renderer, cache, ahead=5, behind=2, workers=2):
+        self.renderer = renderer
+        self.cache = cache
+        self.disk_cache = None  # optional DiskCropCache for the current directory
+        self.ahead = ahead
+        self.behind = behind
+        self.pending = {}  # pdf path -> Future of a render still in flight
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="render-ahead"
+        )
+
+    def get(self, pdf_path):
+        """Return the crop for pdf_path, from the cache, a running job, or a fresh render"""
+        img = self.cache.get(pdf_path)
+        if img is not None:
+            return img
+
+        with self._lock:
+            future = self.pending.get(pdf_path)
+            # A job that has not started yet is cheaper to run here than to
+            # wait for behind the rest of the queue
+            if future is not None and future.cancel():
+                del self.pending[pdf_path]
+                future = None
+        if future is not None:
+            try:
+                img = future.result()
+            except CancelledError:
+                img = None
+            if img is not None:
+                return img
+
+        try:
+            return self._produce(pdf_path, store_async=True)
+        except Exception as e:
+            print(f"Error rendering PDF: {e}")
+            return None
+
+    def _produce(self, pdf_path, store_async=False):
+        """Load a crop from the disk cache or render it, filling both caches"""
+        disk_cache = self.disk_cache
+        img = disk_cache.get(pdf_path) if disk_cache else None
+        if img is None:
+            img = self.renderer.render_image(pdf_path)
+            if disk_cache:
+                if store_async:
+                    # Keep PNG encoding and share I/O off the UI thread
+                    self.executor.submit(disk_cache.put, pdf_path, img)
+                else:
+                    disk_cache.put(pdf_path, img)
+        self.cache.put(pdf_path, img)
+        return img
+
+    def request(self, pdf_path, on_done):
+        """Render pdf_path on a worker for display; on_done(crop or None) is called
+        from the worker thread.
+
+        The newest request wins: queued prefetches and older display requests
+        that have not started yet are cancelled so the worker picks this one
+        up next. A request already in flight for the same path is reused.
+        """
+        self.cancel_pending()
+        with self._lock:
+            future = self.pending.get(pdf_path)
+            if future is None:
+                # The PNG write for the disk cache is queued separately so
+                # the crop reaches the screen before it is encoded
+                future = self.executor.submit(self._render, pdf_path, True)
+                self.pending[pdf_path] = future
+
+        def done(f):
+            on_done(None if f.cancelled() else f.result())
+
+        future.add_done_callback(done)
+
+    def neighbours(self, index, total):
+        """Return the list indices to prerender around index, upcoming ones first"""
+        after = range(index + 1, min(total, index + 1 + self.ahead))
+        before = range(index - 1, max(-1, index - 1 - self.behind), -1)
+        return list(after) + list(before)
+
+    def prefetch(self, pdf_paths):
+        """Queue renders for pdf_paths, dropping queued work that is no longer wanted"""
+        wanted = set(pdf_paths)
+        with self._lock:
+            for path, future in list(self.pending.items()):
+                if path not in wanted and future.cancel():
+                    del self.pending[path]
+
+            for path in pdf_paths:
+                if path in self.pending or path in self.cache:
+                    continue
+                self.pending[path] = self.executor.submit(self._render, path)
+
+    def _render(self, pdf_path, store_async=False):
+        try:
+            return self._produce(pdf_path, store_async)
+        except Exception as e:
+            print(f"Error prerendering PDF: {e}")
+            return None
+        finally:
+            with self._lock:
+                self.pending.pop(pdf_path, None)
+
+    def invalidate(self, pdf_path):
+        """Forget every cached crop of pdf_path so the next get() re-renders it"""
+        self.cache.discard(pdf_path)
+        if self.disk_cache:
+            self.disk_cache.invalidate(pdf_path)
+        if self.renderer.documents:
+            self.renderer.documents.invalidate(pdf_path)
+
+    def cancel_pending(self):
+        """Cancel every queued render that has not started yet"""
+        with self._lock:
+            for path, future in list(self.pending.items()):
+                if future.cancel():
+                    del self.pending[path]
+
+    def shutdown(self):
+        """Stop the worker pool without waiting for queued renders"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,112 @@
+# utils/render_cache.py
+import threading
+from collections import OrderedDict
+
+from utils.memory_budget import image_bytes
+
+
+class RenderCache:
+    """Bounded in-memory LRU cache of rendered crops, keyed by PDF path.
+
+    With a MemoryBudget the cache also charges every entry's bytes against
+    it and gives up its oldest entries when the budget runs over.
+    """
+
+    def __init__(self, max_entries=24, budget=None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self.budget = budget
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if budget:
+            budget.register(self)
+
+    def get(self, key):
+        """Return the cached crop for key (or None), updating hit/miss counters"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a crop, evicting the least recently used entries over the limit"""
+        if value is None:
+            return
+        size = image_bytes(value)
+        with self._lock:
+            freed = image_bytes(self._entries.pop(key, None))
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                freed += image_bytes(self._entries.popitem(last=False)[1])
+            self.bytes += size - freed
+        if self.budget:
+            self.budget.charge(size - freed)
+            self.budget.reclaim()
+
+    def evict_oldest(self):
+        """Drop the least recently used entry, keeping the newest; False if none left to drop"""
+        with self._lock:
+            if len(self._entries) <= 1:
+                return False
+            freed = image_bytes(self._entries.popitem(last=False)[1])
+            self.bytes -= freed
+        if self.budget:
+            self.budget.release(freed)
+        return True
+
+    def capacity(self):
+        """Entries that fit under max_entries and the memory budget, at the current average size"""
+        with self._lock:
+            if not self.budget or not self._entries:
+                return self.max_entries
+            average = self.bytes / len(self._entries)
+        return max(1, min(self.max_entries, int(self.budget.available() // max(1, average))))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def discard(self, key):
+        """Remove a single entry if present"""
+        with self._lock:
+            freed = image_bytes(self._entries.pop(key, None))
+            self.bytes -= freed
+        if self.budget:
+            self.budget.release(freed)
+
+    def clear(self):
+        """Drop every cached crop (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            freed, self.bytes = self.bytes, 0
+        if self.budget:
+            self.budget.release(freed)
+
+    def close(self):
+        """Empty the cache and stop counting against the memory budget"""
+        self.clear()
+        if self.budget:
+            self.budget.unregister(self)
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
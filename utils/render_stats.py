@@ -0,0 +1,128 @@
+# utils/render_stats.py
+import csv
+import json
+import platform
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Render pipeline stages, in order
+STAGES = ("open", "pixmap", "convert", "photo", "draw", "total")
+
+# Upper bounds (ms) of the histogram buckets in exports; the last is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class RenderStats:
+    """Per-stage render timings with a rolling window for percentiles and
+    lifetime histograms for export.
+
+    Stages are recorded from render-ahead workers as well as the UI thread,
+    so all updates go through a lock.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self.last = {}
+        self.counts = {stage: 0 for stage in STAGES}
+        self.histograms = {stage: [0] * (len(BUCKETS_MS) + 1) for stage in STAGES}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage):
+        """Time the body of a with-block as one sample of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def record(self, stage, ms):
+        bucket = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            self.samples[stage].append(ms)
+            self.last[stage] = ms
+            self.counts[stage] += 1
+            self.histograms[stage][bucket] += 1
+
+    def percentile(self, stage, q):
+        """Return the q-quantile (0..1) of the rolling window, or None"""
+        with self._lock:
+            ordered = sorted(self.samples[stage])
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self):
+        """Return {stage: {last_ms, p50_ms, p95_ms, count}} for stages with samples"""
+        result = {}
+        for stage in STAGES:
+            if not self.counts[stage]:
+                continue
+            result[stage] = {
+                "last_ms": round(self.last[stage], 2),
+                "p50_ms": round(self.percentile(stage, 0.5), 2),
+                "p95_ms": round(self.percentile(stage, 0.95), 2),
+                "count": self.counts[stage],
+            }
+        return result
+
+    def overlay_text(self):
+        """One-line summary of last / p95 latency per stage for the status bar"""
+        parts = [
+            f"{stage} {values['last_ms']:.0f}/{values['p95_ms']:.0f}"
+            for stage, values in self.summary().items()
+        ]
+        return "ms last/p95: " + "  ".join(parts) if parts else "No renders timed yet"
+
+    def export(self, path, directory=None, counters=None):
+        """Write the stats to path as JSON, or as CSV if path ends in .csv.
+
+        counters ({name: {counter: value}}, e.g. cache and pool stats) are
+        only included in JSON exports.
+        """
+        summary = self.summary()
+        bucket_labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            histograms = {stage: list(counts) for stage, counts in self.histograms.items()}
+        machine = {
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "directory": directory or "",
+            "exported_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["host", "directory", "stage", "count", "last_ms", "p50_ms", "p95_ms"]
+                    + bucket_labels
+                )
+                for stage, values in summary.items():
+                    writer.writerow(
+                        [machine["host"], machine["directory"], stage, values["count"],
+                         values["last_ms"], values["p50_ms"], values["p95_ms"]]
+                        + histograms[stage]
+                    )
+            return
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "machine": machine,
+                    "stages": summary,
+                    "histogram_buckets": bucket_labels,
+                    "histograms": {stage: histograms[stage] for stage in summary},
+                    "counters": counters or {},
+                },
+                f,
+                indent=2,
+            )
@@ -0,0 +1,78 @@
+# utils/session.py
+import gzip
+import os
+
+from utils.user_config import config_dir, load_json, save_json
+
+SESSION_NAME = "session.json"
+LISTING_NAME = "session_listing.gz"
+
+
+def directory_mtime(directory):
+    """Return the directory's mtime in ns (changes when files are added or removed), or None"""
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def save_session(directory, current_name, current_index, pdf_files, save_listing=True,
+                 recursive=False):
+    """Remember the open directory, position and listing for the next launch.
+
+    The listing is stored gzipped, one name per line: a sorted list of
+    scanner file names compresses to a few bytes per entry. save_listing
+    can be turned off when only the position changed. recursive records
+    whether the directory was open as a workspace with its subfolders.
+    """
+    listing_path = os.path.join(config_dir(), LISTING_NAME)
+    if save_listing:
+        tmp_path = f"{listing_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(config_dir(), exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+                f.write("\n".join(pdf_files))
+            os.replace(tmp_path, listing_path)
+        except OSError as e:
+            print(f"Error saving session listing: {e}")
+            return False
+        snapshot = {
+            "listing_count": len(pdf_files),
+            "directory_mtime_ns": directory_mtime(directory),
+        }
+    else:
+        snapshot = load_json(SESSION_NAME, {})
+        if not isinstance(snapshot, dict) or snapshot.get("directory") != directory:
+            snapshot = {}
+    snapshot.update(
+        {
+            "directory": directory,
+            "current_name": current_name,
+            "current_index": current_index,
+            "recursive": recursive,
+        }
+    )
+    return save_json(SESSION_NAME, snapshot)
+
+
+def load_session():
+    """Return the last session as a dict with its "listing" (a list, or None if
+    it is missing or doesn't match), or None if there is nothing to restore"""
+    snapshot = load_json(SESSION_NAME)
+    if not isinstance(snapshot, dict) or not snapshot.get("directory"):
+        return None
+    if not os.path.isdir(snapshot["directory"]):
+        return None
+
+    listing = None
+    try:
+        with gzip.open(os.path.join(config_dir(), LISTING_NAME), "rt", encoding="utf-8") as f:
+            data = f.read()
+        listing = data.split("\n") if data else []
+    except (OSError, EOFError) as e:
+        print(f"Error reading session listing: {e}")
+    if listing is not None and len(listing) != snapshot.get("listing_count"):
+        listing = None
+    snapshot["listing"] = listing
+    return snapshot
+
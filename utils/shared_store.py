@@ -0,0 +1,212 @@
+# utils/shared_store.py
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.filesystem import is_network_path
+
+DB_NAME = "pdf_notes.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    pdf_file TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS notes (
+    pdf_file TEXT PRIMARY KEY,
+    note TEXT NOT NULL DEFAULT '',
+    flagged INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL,
+    operator TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS notes_seq ON notes(seq);
+CREATE TABLE IF NOT EXISTS claims (
+    pdf_file TEXT PRIMARY KEY,
+    operator TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_operator ON claims(operator);
+"""
+
+
+def db_path(directory):
+    return os.path.join(directory, DB_NAME)
+
+
+class SharedNotesStore:
+    """SQLite notes store that lets several operators work one directory.
+
+    Every note/flag change is a single-row upsert stamped with an increasing
+    sequence number, so other operators pick up changes incrementally with
+    changes_since(). Unfinished files can be claimed with a lease so two
+    operators are never handed the same document.
+    """
+
+    def __init__(self, directory, operator, lease_seconds=600):
+        self.path = db_path(directory)
+        self.operator = operator
+        self.lease_seconds = lease_seconds
+        self.last_seq = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            self.path, timeout=10, isolation_level=None, check_same_thread=False
+        )
+        # WAL's shared-memory index only works between processes on one
+        # host, so on a network share use a rollback journal; writers then
+        # wait on the busy timeout above instead of running concurrently
+        self.network = is_network_path(directory)
+        if self.network:
+            self.conn.execute("PRAGMA journal_mode=DELETE")
+        else:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def is_empty(self):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone() is None
+
+    @contextmanager
+    def _transaction(self):
+        """Yield a cursor inside an immediate (write-locking) transaction"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def register_files(self, pdf_files):
+        """Make the directory listing known to claim_next()"""
+        with self._transaction() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO files (pdf_file) VALUES (?)",
+                ((pdf_file,) for pdf_file in pdf_files),
+            )
+
+    def unregister_files(self, pdf_files):
+        """Forget files that were removed or renamed, along with their claims"""
+        rows = [(pdf_file,) for pdf_file in pdf_files]
+        with self._transaction() as cur:
+            cur.executemany("DELETE FROM files WHERE pdf_file = ?", rows)
+            cur.executemany("DELETE FROM claims WHERE pdf_file = ?", rows)
+
+    def sync_files(self, pdf_files):
+        """Make the files known to claim_next() exactly the full directory listing"""
+        with self._transaction() as cur:
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS listed (pdf_file TEXT PRIMARY KEY)")
+            cur.execute("DELETE FROM listed")
+            cur.executemany(
+                "INSERT OR IGNORE INTO listed (pdf_file) VALUES (?)",
+                ((pdf_file,) for pdf_file in pdf_files),
+            )
+            cur.execute("INSERT OR IGNORE INTO files (pdf_file) SELECT pdf_file FROM listed")
+            cur.execute("DELETE FROM files WHERE pdf_file NOT IN (SELECT pdf_file FROM listed)")
+            cur.execute("DELETE FROM claims WHERE pdf_file NOT IN (SELECT pdf_file FROM files)")
+            cur.execute("DELETE FROM listed")
+
+    def import_rows(self, notes_dict, flags_dict):
+        """Seed an empty database from existing CSV notes"""
+        now = time.time()
+        rows = [
+            (pdf_file, notes_dict.get(pdf_file, ""),
+             1 if flags_dict.get(pdf_file, False) else 0,
+             seq, self.operator, now)
+            for seq, pdf_file in enumerate(sorted(set(notes_dict) | set(flags_dict)), 1)
+        ]
+        with self._transaction() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO notes "
+                "(pdf_file, note, flagged, seq, operator, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def load(self):
+        """Return (notes_dict, flags_dict) and remember the latest sequence seen"""
+        notes_dict = {}
+        flags_dict = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT pdf_file, note, flagged, seq FROM notes"
+            ).fetchall()
+        for pdf_file, note, flagged, seq in rows:
+            if note:
+                notes_dict[pdf_file] = note
+            if flagged:
+                flags_dict[pdf_file] = True
+            self.last_seq = max(self.last_seq, seq)
+        return notes_dict, flags_dict
+
+    def _upsert(self, pdf_file, column, value):
+        now = time.time()
+        with self._transaction() as cur:
+            cur.execute(
+                f"INSERT INTO notes (pdf_file, {column}, seq, operator, updated_at) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM notes), ?, ?) "
+                f"ON CONFLICT(pdf_file) DO UPDATE SET {column} = excluded.{column}, "
+                "seq = excluded.seq, operator = excluded.operator, "
+                "updated_at = excluded.updated_at",
+                (pdf_file, value, self.operator, now),
+            )
+            if column == "note" and value:
+                # A finished file no longer needs its claim
+                cur.execute("DELETE FROM claims WHERE pdf_file = ?", (pdf_file,))
+
+    def set_note(self, pdf_file, note):
+        self._upsert(pdf_file, "note", note)
+
+    def set_flag(self, pdf_file, flagged):
+        self._upsert(pdf_file, "flagged", 1 if flagged else 0)
+
+    def changes_since(self):
+        """Return [(pdf_file, note, flagged)] changed since the last call or load"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT pdf_file, note, flagged, seq FROM notes "
+                "WHERE seq > ? ORDER BY seq",
+                (self.last_seq,),
+            ).fetchall()
+        if rows:
+            self.last_seq = rows[-1][3]
+        return [(pdf_file, note, bool(flagged)) for pdf_file, note, flagged, _ in rows]
+
+    def claim_next(self, after=""):
+        """Claim the next unfinished, unflagged file after `after` that nobody
+        else holds a live lease on, wrapping around once. Returns the file or None.
+        """
+        now = time.time()
+        query = (
+            "SELECT f.pdf_file FROM files f "
+            "LEFT JOIN notes n ON n.pdf_file = f.pdf_file "
+            "LEFT JOIN claims c ON c.pdf_file = f.pdf_file "
+            "WHERE COALESCE(n.note, '') = '' AND COALESCE(n.flagged, 0) = 0 "
+            "AND (c.pdf_file IS NULL OR c.expires_at < ? OR c.operator = ?) "
+            "AND f.pdf_file > ? ORDER BY f.pdf_file LIMIT 1"
+        )
+        with self._transaction() as cur:
+            row = cur.execute(query, (now, self.operator, after)).fetchone()
+            if row is None and after:
+                row = cur.execute(query, (now, self.operator, "")).fetchone()
+            # An operator holds at most one claim at a time
+            cur.execute("DELETE FROM claims WHERE operator = ?", (self.operator,))
+            if row is not None:
+                cur.execute(
+                    "INSERT OR REPLACE INTO claims (pdf_file, operator, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (row[0], self.operator, now + self.lease_seconds),
+                )
+        return row[0] if row else None
+
+    def release_claims(self):
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM claims WHERE operator = ?", (self.operator,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,172 @@
+# utils/text_index.py
+import bisect
+import os
+import re
+import threading
+from collections import deque
+
+from utils.pdf_renderer import FITZ_LOCK
+
+# A letter prefix followed by 6-10 digits, e.g. "A1234567"
+DEFAULT_CITATION_PATTERN = r"\b[A-Z]{1,3}\d{6,10}\b"
+
+
+def _read(pdf_path):
+    with open(pdf_path, "rb") as f:
+        return f.read()
+
+
+def extract_candidates(pdf_path, renderer, pattern):
+    """Return the citation numbers found in the text layer inside the renderer's clip.
+
+    Matches come back uppercased, de-duplicated and in reading order; a
+    scanned page without a text layer simply yields an empty list. A
+    document open in the renderer's pool is reused; otherwise the file is
+    read before FITZ_LOCK is taken and opened just for this, so the
+    background walk doesn't push the displayed documents out of the pool.
+    """
+    import fitz
+
+    pool = renderer.documents
+    data = None
+    if not (pool and pool.opened(pdf_path)):
+        data = pool.peek(pdf_path) if pool else None
+        if data is None:
+            data = _read(pdf_path)
+    with FITZ_LOCK:
+        pooled = pool.opened(pdf_path) if pool else None
+        if pooled is None and data is None:
+            # Evicted since it was looked up
+            data = _read(pdf_path)
+        doc = pooled or fitz.open(stream=data, filetype="pdf")
+        try:
+            page = doc[0]
+            text = page.get_text("text", clip=renderer.clip_rect(page.rect))
+        finally:
+            if pooled is None:
+                doc.close()
+    candidates = []
+    for match in pattern.finditer(text.upper()):
+        value = match.group(0)
+        if value not in candidates:
+            candidates.append(value)
+    return candidates
+
+
+class TextIndex:
+    """Citation-number candidates per PDF, extracted from text layers in the background.
+
+    A daemon thread walks the directory listing and fills `candidates`
+    (file name -> list of matches). Files the operator is about to look at
+    can be moved to the front with prioritize(); on_found(pdf_file,
+    candidates) is posted through the dispatcher for every file indexed.
+    Files listed later are queued with add(). The thread waits for the
+    renderer to go idle before each file, so it never delays a crop.
+    """
+
+    def __init__(self, renderer, dispatcher, pattern=DEFAULT_CITATION_PATTERN):
+        self.renderer = renderer
+        self.dispatcher = dispatcher
+        self.pattern = re.compile(pattern) if pattern else None
+        self.on_found = None
+        self.candidates = {}
+        self.directory = None
+        self.pdf_files = []
+        self._queue = deque()  # files still to index, in listing order
+        self._priority = deque()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.pattern is not None and self.dispatcher is not None
+
+    def reset(self, directory, pdf_files):
+        """Start indexing a new directory; pdf_files is the live listing it keeps reading"""
+        with self._lock:
+            self._generation += 1
+            self.candidates = {}
+            self.directory = directory
+            self.pdf_files = pdf_files
+            self._queue = deque(pdf_files)
+            self._priority.clear()
+        self.wake()
+
+    def add(self, pdf_files):
+        """Queue files that were added to the listing"""
+        with self._lock:
+            self._queue.extend(pdf_files)
+        self.wake()
+
+    def wake(self):
+        """Resume after the listing grew (e.g. more of a scan arrived)"""
+        if not self.enabled or self._stopped:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="text-index", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def prioritize(self, pdf_files):
+        """Index these files next, the first one first"""
+        with self._lock:
+            for pdf_file in reversed(pdf_files):
+                if pdf_file not in self.candidates:
+                    self._priority.appendleft(pdf_file)
+        self.wake()
+
+    def discard(self, pdf_files):
+        """Forget files that were rewritten so they are indexed again"""
+        with self._lock:
+            for pdf_file in pdf_files:
+                self.candidates.pop(pdf_file, None)
+                self._priority.append(pdf_file)
+        self.wake()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _listed(self, pdf_file):
+        i = bisect.bisect_left(self.pdf_files, pdf_file)
+        return i < len(self.pdf_files) and self.pdf_files[i] == pdf_file
+
+    def _next(self):
+        """Return (generation, directory, pdf_file) of the next file to index, or None"""
+        with self._lock:
+            for queue in (self._priority, self._queue):
+                while queue:
+                    pdf_file = queue.popleft()
+                    if pdf_file not in self.candidates and self._listed(pdf_file):
+                        return self._generation, self.directory, pdf_file
+            return None
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.clear()
+            item = self._next()
+            if item is None:
+                self._wake.wait()
+                continue
+            generation, directory, pdf_file = item
+            self.renderer.wait_idle()
+            try:
+                found = extract_candidates(
+                    os.path.join(directory, pdf_file), self.renderer, self.pattern
+                )
+            except Exception as e:
+                print(f"Error reading text layer: {e}")
+                found = []
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                self.candidates[pdf_file] = found
+            if found and self.on_found:
+                self.dispatcher.call_soon(self._deliver, generation, pdf_file, found)
+
+    def _deliver(self, generation, pdf_file, found):
+        if generation == self._generation and self.on_found:
+            self.on_found(pdf_file, found)
@@ -0,0 +1,143 @@
+# utils/tile_renderer.py
+import math
+import threading
+from collections import OrderedDict
+
+from utils.pdf_renderer import FITZ_LOCK, PPMCrop, threshold_table
+from utils.render_cache import RenderCache
+
+# Zoom factors offered in inspection mode (1.0 = 72 dpi, 8.0 = 576 dpi)
+ZOOM_LEVELS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0)
+TILE_SIZE = 256  # pixels
+
+
+class TileRenderer:
+    """Renders square tiles of any page of one PDF at a given zoom level.
+
+    Only the tiles that are asked for are rasterized, so a corner of a
+    600 dpi scan can be inspected without rendering the whole page at full
+    resolution. The document stays open while inspecting, which lets MuPDF
+    reuse the decoded page image between tiles. Tiles are kept in one LRU
+    cache per zoom level; only the most recently used levels are kept.
+
+    With bilevel_threshold set, tiles are rendered gray and thresholded to
+    black and white like the bilevel crop.
+    """
+
+    def __init__(self, pdf_path, tile_size=TILE_SIZE, tiles_per_level=96, levels_kept=3,
+                 colorspace=None, budget=None, bilevel_threshold=None):
+        import fitz
+
+        self.pdf_path = pdf_path
+        self.colorspace = colorspace or fitz.csRGB
+        self.threshold_table = None
+        if bilevel_threshold is not None:
+            self.colorspace = fitz.csGRAY
+            self.threshold_table = threshold_table(bilevel_threshold)
+        self.budget = budget  # optional MemoryBudget the tile caches count against
+        self.tile_size = tile_size
+        self.tiles_per_level = tiles_per_level
+        self.levels_kept = levels_kept
+        self.caches = OrderedDict()  # zoom -> RenderCache of (page, col, row) tiles
+        self._lock = threading.Lock()
+        # Read the file outside the lock so a slow share doesn't stall
+        # other renders, and so the document doesn't hold the file open
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        with FITZ_LOCK:
+            self.doc = fitz.open(stream=data, filetype="pdf")
+            self.page_count = len(self.doc)
+            self.page_rects = [page.rect for page in self.doc]
+
+    def page_pixels(self, page_no, zoom):
+        """Return the (width, height) of a page rendered at zoom"""
+        rect = self.page_rects[page_no]
+        return math.ceil(rect.width * zoom), math.ceil(rect.height * zoom)
+
+    def grid(self, page_no, zoom):
+        """Return the number of (columns, rows) of tiles covering a page"""
+        width, height = self.page_pixels(page_no, zoom)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def tiles_in(self, page_no, zoom, x0, y0, x1, y1, margin=1):
+        """Return the (col, row) tiles intersecting a pixel box plus a margin,
+        nearest to the box centre first"""
+        cols, rows = self.grid(page_no, zoom)
+        size = self.tile_size
+        c0 = max(0, int(x0 // size) - margin)
+        r0 = max(0, int(y0 // size) - margin)
+        c1 = min(cols - 1, int(x1 // size) + margin)
+        r1 = min(rows - 1, int(y1 // size) + margin)
+        cx = (x0 + x1) / 2 / size
+        cy = (y0 + y1) / 2 / size
+        tiles = [(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+        tiles.sort(key=lambda t: (t[0] + 0.5 - cx) ** 2 + (t[1] + 0.5 - cy) ** 2)
+        return tiles
+
+    def cache_for(self, zoom):
+        with self._lock:
+            cache = self.caches.get(zoom)
+            if cache is None:
+                cache = self.caches[zoom] = RenderCache(
+                    max_entries=self.tiles_per_level, budget=self.budget
+                )
+                while len(self.caches) > self.levels_kept:
+                    self.caches.popitem(last=False)[1].close()
+            self.caches.move_to_end(zoom)
+            return cache
+
+    def cached_tile(self, page_no, zoom, col, row):
+        """Return a tile if it is already rendered, else None"""
+        with self._lock:
+            cache = self.caches.get(zoom)
+        return cache.get((page_no, col, row)) if cache else None
+
+    def render_tile(self, page_no, zoom, col, row):
+        """Return (x, y, PPMCrop) for one tile, x/y being its pixel offset on the page.
+
+        Safe to call from worker threads; raises on failure.
+        """
+        cache = self.cache_for(zoom)
+        key = (page_no, col, row)
+        tile = cache.get(key)
+        if tile is not None:
+            return tile
+
+        import fitz
+
+        rect = self.page_rects[page_no]
+        step = self.tile_size / zoom
+        clip = fitz.Rect(
+            rect.x0 + col * step,
+            rect.y0 + row * step,
+            rect.x0 + (col + 1) * step,
+            rect.y0 + (row + 1) * step,
+        ) & rect
+        with FITZ_LOCK:
+            page = self.doc[page_no]
+            pix = page.get_pixmap(
+                matrix=fitz.Matrix(zoom, zoom),
+                clip=clip,
+                colorspace=self.colorspace,
+                alpha=False,
+            )
+        # pix.x/pix.y are the tile's device-space origin, so tiles line up
+        # exactly even where fitz rounds the clip outwards
+        origin_x = round(rect.x0 * zoom)
+        origin_y = round(rect.y0 * zoom)
+        if self.threshold_table:
+            header = f"P5\n{pix.width} {pix.height}\n255\n".encode("ascii")
+            data = header + pix.samples.translate(self.threshold_table)
+        else:
+            data = pix.tobytes("ppm")
+        tile = (pix.x - origin_x, pix.y - origin_y, PPMCrop(pix.width, pix.height, data))
+        cache.put(key, tile)
+        return tile
+
+    def close(self):
+        with FITZ_LOCK:
+            self.doc.close()
+        with self._lock:
+            for cache in self.caches.values():
+                cache.close()
+            self.caches.clear()
@@ -0,0 +1,61 @@
+# utils/user_config.py
+import json
+import os
+import sys
+
+APP_DIR_NAME = "pdf-directory-viewer"
+SETTINGS_NAME = "settings.json"
+
+
+def config_dir():
+    """Return the per-user configuration folder of the viewer (not created)"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, APP_DIR_NAME)
+
+
+def load_json(name, default=None):
+    """Read a JSON file from the config folder; default if missing or unreadable"""
+    try:
+        with open(os.path.join(config_dir(), name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(name, data):
+    """Atomically write a JSON file to the config folder; returns True on success"""
+    directory = config_dir()
+    path = os.path.join(directory, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"Error saving {name}: {e}")
+        return False
+
+
+def directory_setting(directory, key, default=None):
+    """Return a setting remembered for one PDF directory"""
+    settings = load_json(SETTINGS_NAME, {})
+    if not isinstance(settings, dict):
+        return default
+    return settings.get("directories", {}).get(os.path.abspath(directory), {}).get(key, default)
+
+
+def set_directory_setting(directory, key, value):
+    """Remember a setting for one PDF directory"""
+    settings = load_json(SETTINGS_NAME, {})
+    if not isinstance(settings, dict):
+        settings = {}
+    directories = settings.setdefault("directories", {})
+    directories.setdefault(os.path.abspath(directory), {})[key] = value
+    return save_json(SETTINGS_NAME, settings)